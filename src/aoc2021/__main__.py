@@ -1,16 +1,17 @@
 import datetime as dt
+import io
+import json
 import os
 import re
 from pathlib import Path
-from typing import IO
+from typing import IO, TYPE_CHECKING, Callable
 
 import click
-import httpx
-from dotenv import load_dotenv
 
-from ._registry import solvers
+from ._registry import options, solvers
 
-INPUT_URL = "https://adventofcode.com/2021/day/{day}/input"
+if TYPE_CHECKING:
+    from ._profile import ProfileOptions
 
 
 @click.group(context_settings=dict(help_option_names=["-h", "--help"]))
@@ -18,21 +19,143 @@ def cli() -> None:
     pass
 
 
-@cli.command()
-@click.argument("day", type=click.IntRange(min=1, max=25))
-@click.argument("file", type=click.File("x"))
-def download(day: int, file: IO[str]) -> None:
-    """Download input for DAY to FILE. Will not overwrite."""
+def parse_days(
+    ctx: click.Context, param: click.Parameter, value: str | None
+) -> list[int] | None:
+    """Parse comma separated days and inclusive ranges, e.g. ``1-5,7,9-11``."""
+    if value is None:
+        return None
+
+    days: set[int] = set()
+    for part in value.split(","):
+        if match := re.fullmatch(r"\s*(\d+)\s*(?:-\s*(\d+)\s*)?", part):
+            start = int(match.group(1))
+            end = int(match.group(2) or start)
+        else:
+            raise click.BadParameter(f"{part!r} is not a day or range of days")
+
+        if not 1 <= start <= end <= 25:
+            raise click.BadParameter(f"{part!r} is not a valid range within 1-25")
+
+        days.update(range(start, end + 1))
+
+    return sorted(days)
+
+
+def session_cookies() -> dict[str, str]:
+    from dotenv import load_dotenv
+
     load_dotenv()
     try:
-        cookies = dict(session=os.environ["AOC_SESSION"])
+        return dict(session=os.environ["AOC_SESSION"])
     except KeyError:
         raise click.UsageError(
             "Set AOC_SESSION environment variable (or add to .env file)"
         )
-    response = httpx.get(INPUT_URL.format(day=day), cookies=cookies)
-    response.raise_for_status()
-    file.write(response.text)
+
+
+base_url = click.option(
+    "--base-url",
+    envvar="AOC_BASE_URL",
+    default="https://adventofcode.com",
+    show_default=True,
+    help="Server to download inputs from.",
+)
+
+concurrency = click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help="Maximum number of simultaneous downloads.",
+)
+
+
+def download_inputs(
+    days: list[int],
+    input_dir: Path,
+    cookies: dict[str, str],
+    base_url: str,
+    concurrency: int,
+) -> None:
+    import asyncio
+
+    from ._download import fetch_inputs
+
+    errors = asyncio.run(
+        fetch_inputs(
+            days,
+            input_dir=input_dir,
+            cookies=cookies,
+            base_url=base_url,
+            concurrency=concurrency,
+        )
+    )
+    failed = []
+    for day, error in errors.items():
+        if error is not None:
+            failed.append(day)
+            click.secho(f"Day {day}: {error}", fg="red", err=True)
+
+    if failed:
+        raise click.ClickException(f"Download failed: {', '.join(map(str, failed))}")
+
+
+@cli.command()
+@click.argument("day", type=click.IntRange(min=1, max=25), required=False)
+@click.argument(
+    "file",
+    type=click.Path(dir_okay=False, allow_dash=True, path_type=Path),
+    required=False,
+)
+@click.option(
+    "--days",
+    callback=parse_days,
+    help="Download a selection of days into the input directory, e.g. 1-15.",
+)
+@click.option(
+    "--input-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default="input",
+    show_default=True,
+    help="Directory used to cache downloaded inputs.",
+)
+@base_url
+@concurrency
+def download(
+    day: int | None,
+    file: Path | None,
+    days: list[int] | None,
+    input_dir: Path,
+    base_url: str,
+    concurrency: int,
+) -> None:
+    """Download input for DAY to FILE, or stdout if FILE is -. Will not overwrite.
+
+    Inputs are cached in the input directory and aren't downloaded again if
+    they already exist there. With --days, the inputs are downloaded
+    concurrently into the input directory.
+    """
+    if days is not None:
+        if day is not None:
+            raise click.UsageError("DAY cannot be combined with --days")
+        download_inputs(days, input_dir, session_cookies(), base_url, concurrency)
+        return
+
+    if day is None or file is None:
+        raise click.UsageError("Pass DAY and FILE, or --days")
+
+    to_stdout = str(file) == "-"
+    if not to_stdout and file.exists():
+        raise click.UsageError(f"File already exists: {file}")
+
+    download_inputs([day], input_dir, session_cookies(), base_url, concurrency)
+    cached = input_dir / f"{day:02d}.txt"
+    if to_stdout:
+        click.echo(cached.read_text(), nl=False)
+    elif file.resolve() != cached.resolve():
+        with open(file, "x") as fp:
+            fp.write(cached.read_text())
 
 
 verbose = click.option(
@@ -46,18 +169,556 @@ verbose = click.option(
 )
 
 
+timings = click.option(
+    "-t",
+    "--timings",
+    is_flag=True,
+    help="Print how long each phase of the solver took to stderr.",
+)
+
+
+use_cache = click.option(
+    "--cache/--no-cache",
+    "use_cache",
+    default=True,
+    show_default=True,
+    help="Reuse results from previous runs with the same input and source.",
+)
+
+
+def profile_options(f: Callable[..., None]) -> Callable[..., None]:
+    f = click.option(
+        "--profile-output",
+        type=click.Path(dir_okay=False, path_type=Path),
+        help=(
+            "Write a .pstats file (cprofile) or collapsed stacks for flamegraph "
+            "tools (sampling). For bench, {day} in the path is replaced by the "
+            "day."
+        ),
+    )(f)
+    f = click.option(
+        "--profile-top",
+        type=click.IntRange(min=1),
+        default=20,
+        show_default=True,
+        help="Number of functions to show in the profile report.",
+    )(f)
+    f = click.option(
+        "--profile",
+        type=click.Choice(["cprofile", "sampling"]),
+        is_flag=False,
+        flag_value="cprofile",
+        help="Profile the solver and print its hottest functions to stderr.",
+    )(f)
+    return f
+
+
+def parse_size(
+    ctx: click.Context, param: click.Parameter, value: str | None
+) -> int | None:
+    """Parse a size in bytes with an optional K, M or G (binary) suffix."""
+    if value is None:
+        return None
+
+    if match := re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?\s*", value, re.I):
+        number, unit = match.groups()
+        return int(float(number) * 1024 ** " KMG".index(unit.upper() or " "))
+
+    raise click.BadParameter(f"{value!r} is not a size, e.g. 512M or 2G")
+
+
+def memory_options(f: Callable[..., None]) -> Callable[..., None]:
+    f = click.option(
+        "--memory-top",
+        type=click.IntRange(min=1),
+        default=10,
+        show_default=True,
+        help="Number of allocation sites to show in the memory report.",
+    )(f)
+    f = click.option(
+        "--max-memory",
+        callback=parse_size,
+        help="Fail if traced memory exceeds this size, e.g. 512M. Implies --memory.",
+    )(f)
+    f = click.option(
+        "--memory",
+        is_flag=True,
+        help=(
+            "Trace allocations and print peak memory and the top allocation "
+            "sites to stderr."
+        ),
+    )(f)
+    return f
+
+
+def check_engine(
+    ctx: click.Context, param: click.Parameter, value: str | None
+) -> str | None:
+    if value is None:
+        return None
+
+    from .day05 import ENGINES
+
+    if value not in ENGINES:
+        raise click.BadParameter(f"{value!r} is not one of {', '.join(ENGINES)}")
+    return value
+
+
+def solver_options(f: Callable[..., None]) -> Callable[..., None]:
+    f = click.option(
+        "--engine",
+        callback=check_engine,
+        help=(
+            "How day 5 counts overlapping points: walk, raster or sweep. Implies "
+            "--no-cache."
+        ),
+    )(f)
+    f = click.option(
+        "--workers",
+        type=click.IntRange(min=1),
+        help=(
+            "Search day 15 in parallel with this many worker processes. Implies "
+            "--no-cache."
+        ),
+    )(f)
+    return f
+
+
+# The day that reads each solver option.
+SOLVER_OPTION_DAYS = {"engine": 5, "workers": 15}
+
+
+def set_solver_options(day: int, **values: object) -> bool:
+    """Set the solver options that were given, returning whether there were any.
+
+    Results are cached regardless of these options, so runs that pick an
+    implementation shouldn't use the cache, or they'd time the wrong one.
+    """
+    given = {name: value for name, value in values.items() if value is not None}
+    for name in given:
+        if name in SOLVER_OPTION_DAYS and SOLVER_OPTION_DAYS[name] != day:
+            raise click.UsageError(
+                f"--{name} only applies to day {SOLVER_OPTION_DAYS[name]}"
+            )
+    options.update(given)
+    return bool(given)
+
+
+def make_profile_options(
+    kind: str | None, top: int, output: Path | None
+) -> "ProfileOptions | None":
+    if kind is None:
+        return None
+
+    from ._profile import ProfileOptions
+
+    return ProfileOptions(kind, top, output)
+
+
+def echo_timings(timings: dict[str, float], cached: bool = False) -> None:
+    click.secho(
+        ("(cached) " if cached else "")
+        + "  ".join(
+            f"{name}: {seconds * 1000:.3f} ms" for name, seconds in timings.items()
+        ),
+        fg="bright_black",
+        err=True,
+    )
+
+
+def run_one(
+    day: int,
+    file: IO[str],
+    verbose: int,
+    timings: bool,
+    use_cache: bool,
+    profile: "ProfileOptions | None",
+    memory: bool,
+    max_memory: int | None,
+    memory_top: int,
+) -> None:
+    """Run a single day, printing its output.
+
+    Profiling or tracing memory always runs the solver rather than using the
+    cache.
+    """
+    from contextlib import nullcontext
+
+    from ._cache import ResultCache
+    from ._runner import solve_cached
+
+    memory = memory or max_memory is not None
+    if profile is not None or memory:
+        use_cache = False
+
+    profiler = tracer = None
+    if profile is not None:
+        from ._profile import make_profiler
+
+        profiler = make_profiler(profile.kind)
+    if memory:
+        from ._memory import MemoryTracer
+
+        tracer = MemoryTracer(max_memory)
+
+    # Import the solver first, so that importing it isn't profiled or traced.
+    solve = solvers[day] if profiler is not None or tracer is not None else None
+    try:
+        with profiler or nullcontext(), tracer or nullcontext():
+            phase_timings, cached = solve_cached(
+                day, file, verbose, ResultCache() if use_cache else None, solve
+            )
+    except Exception as exc:
+        from ._memory import MemoryBudgetExceeded
+
+        if not isinstance(exc, MemoryBudgetExceeded):
+            raise
+        assert tracer is not None
+        click.echo(tracer.report.format(memory_top), err=True, nl=False)
+        raise click.ClickException(str(exc))
+
+    if profiler is not None and profile is not None:
+        click.echo(profiler.report(profile.top), err=True, nl=False)
+        if profile.output is not None:
+            profiler.dump(profile.output)
+
+    if tracer is not None:
+        click.echo(tracer.report.format(memory_top), err=True, nl=False)
+
+    if timings:
+        echo_timings(phase_timings, cached)
+
+
+def run_many(
+    days: list[int], verbose: int, jobs: int | None, timings: bool, use_cache: bool
+) -> None:
+    from ._cache import ResultCache
+    from ._runner import run_days
+
+    if unimplemented := [day for day in days if day not in solvers]:
+        raise click.UsageError(f"Unimplemented: {', '.join(map(str, unimplemented))}")
+
+    failed = []
+    cache = ResultCache() if use_cache else None
+    for result in run_days(days, verbose=verbose, jobs=jobs, cache=cache):
+        click.secho(f"Day {result.day}", fg="green", bold=True)
+        click.echo(result.output, nl=False)
+        if timings and result.ok:
+            echo_timings(result.timings, result.cached)
+        if not result.ok:
+            failed.append(result.day)
+            click.secho(result.error, fg="red", err=True, nl=False)
+
+    if failed:
+        raise click.ClickException(f"Failed: {', '.join(map(str, failed))}")
+
+
 @cli.command()
-@click.argument("day", type=click.IntRange(min=1, max=25))
+@click.argument("day", type=click.IntRange(min=1, max=25), required=False)
 @click.argument("file", type=click.File("r"), default="-")
+@click.option("--all", "all_days", is_flag=True, help="Run every implemented day.")
+@click.option(
+    "--days",
+    callback=parse_days,
+    help="Run a selection of days, e.g. 1-15 or 1,3,5-7.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of worker processes for --all/--days. Defaults to CPU count.",
+)
+@click.option(
+    "--via",
+    type=click.Path(dir_okay=False, path_type=Path),
+    envvar="AOC_SOCKET",
+    help=(
+        "Solve using the server listening on this socket (see serve), falling "
+        "back to solving locally if it isn't running."
+    ),
+)
 @verbose
-def run(day: int, file: IO[str], verbose: int) -> None:
-    """If FILE is not passed, stdin is used instead."""
-    try:
-        solve = solvers[day]
-    except KeyError:
+@timings
+@use_cache
+@profile_options
+@memory_options
+@solver_options
+def run(
+    day: int | None,
+    file: IO[str],
+    all_days: bool,
+    days: list[int] | None,
+    jobs: int | None,
+    via: Path | None,
+    verbose: int,
+    timings: bool,
+    use_cache: bool,
+    profile: str | None,
+    profile_top: int,
+    profile_output: Path | None,
+    memory: bool,
+    max_memory: int | None,
+    memory_top: int,
+    engine: str | None,
+    workers: int | None,
+) -> None:
+    """If FILE is not passed, stdin is used instead.
+
+    With --all or --days, each day is run in parallel using its input from the
+    input directory and output is printed in day order.
+    """
+    if all_days or days is not None:
+        if day is not None:
+            raise click.UsageError("DAY cannot be combined with --all or --days")
+        if all_days and days is not None:
+            raise click.UsageError("--all and --days are mutually exclusive")
+        if profile is not None or memory or max_memory is not None:
+            raise click.UsageError(
+                "--profile and --memory can't be used with --all or --days"
+            )
+        if engine is not None or workers is not None:
+            raise click.UsageError(
+                "--engine and --workers can't be used with --all or --days"
+            )
+        run_many(
+            sorted(solvers) if all_days else days or [],
+            verbose,
+            jobs,
+            timings,
+            use_cache,
+        )
+        return
+
+    if day is None:
+        raise click.UsageError("Missing argument 'DAY'.")
+
+    if day not in solvers:
         raise click.UsageError("Unimplemented!")
 
-    solve(file, verbose)
+    if via is not None and (profile is not None or memory or max_memory is not None):
+        raise click.UsageError("--profile and --memory can't be used with --via")
+    if via is not None and (engine is not None or workers is not None):
+        raise click.UsageError("--engine and --workers can't be used with --via")
+    if set_solver_options(day, engine=engine, workers=workers):
+        use_cache = False
+
+    if via is not None:
+        from ._server import request
+
+        text = file.read()
+        try:
+            result = request(via, day, text, verbose)
+        except OSError:
+            file = io.StringIO(text)
+        else:
+            click.echo(result.output, nl=False)
+            if not result.ok:
+                click.secho(result.error, fg="red", err=True, nl=False)
+                raise click.ClickException("Solver failed")
+            if timings:
+                echo_timings(result.timings)
+            return
+
+    run_one(
+        day,
+        file,
+        verbose,
+        timings,
+        use_cache,
+        make_profile_options(profile, profile_top, profile_output),
+        memory,
+        max_memory,
+        memory_top,
+    )
+
+
+@cli.command()
+@click.option(
+    "--days",
+    callback=parse_days,
+    help="Days to benchmark, e.g. 1-15 or 1,3,5-7. Defaults to every day.",
+)
+@click.option(
+    "-n", "--repeat", type=click.IntRange(min=1), default=5, show_default=True
+)
+@click.option(
+    "-w", "--warmup", type=click.IntRange(min=0), default=1, show_default=True
+)
+@click.option(
+    "--json",
+    "json_file",
+    type=click.File("w"),
+    help="Write a machine-readable report to this file.",
+)
+@profile_options
+def bench(
+    days: list[int] | None,
+    repeat: int,
+    warmup: int,
+    json_file: IO[str] | None,
+    profile: str | None,
+    profile_top: int,
+    profile_output: Path | None,
+) -> None:
+    """Time solvers using the files in the input directory.
+
+    Output is suppressed and input is read before timing starts. Each day runs
+    in a fresh process so that peak RSS is reported per day. With --profile,
+    the timed runs are profiled, which slows them down.
+    """
+    from ._bench import bench_days, report
+    from ._memory import format_bytes
+
+    if days is None:
+        days = sorted(solvers)
+    elif unimplemented := [day for day in days if day not in solvers]:
+        raise click.UsageError(f"Unimplemented: {', '.join(map(str, unimplemented))}")
+
+    if (
+        profile_output is not None
+        and len(days) > 1
+        and "{day}" not in str(profile_output)
+    ):
+        raise click.UsageError(
+            "--profile-output must contain {day} when benchmarking several days"
+        )
+
+    click.echo(
+        f"{'day':>3}  {'min (s)':>10}  {'median (s)':>10}  {'p95 (s)':>10}"
+        f"  {'peak RSS':>10}"
+    )
+    results = []
+    for result in bench_days(
+        days,
+        input_dir=Path("input"),
+        repeat=repeat,
+        warmup=warmup,
+        profile=make_profile_options(profile, profile_top, profile_output),
+    ):
+        results.append(result)
+        if result.error is not None:
+            click.secho(f"{result.day:>3}  failed", fg="red")
+            click.secho(result.error, fg="red", err=True, nl=False)
+            continue
+
+        click.echo(
+            f"{result.day:>3}  {result.min:>10.6f}  {result.median:>10.6f}"
+            f"  {result.p95:>10.6f}  {format_bytes(result.peak_rss):>10}"
+        )
+        if result.profile is not None:
+            click.echo(result.profile, err=True, nl=False)
+
+    if json_file is not None:
+        json.dump(report(results, repeat=repeat, warmup=warmup), json_file, indent=2)
+        json_file.write("\n")
+
+    if failed := [result.day for result in results if result.error is not None]:
+        raise click.ClickException(f"Failed: {', '.join(map(str, failed))}")
+
+
+@cli.command("bench-workers")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    multiple=True,
+    default=(1, 2, 4, 8),
+    show_default=True,
+    help="Numbers of worker processes to time. May be repeated.",
+)
+@click.option(
+    "-n", "--repeat", type=click.IntRange(min=1), default=3, show_default=True
+)
+@click.option(
+    "--block-size", type=click.IntRange(min=1), default=128, show_default=True
+)
+def bench_workers(
+    file: Path, workers: tuple[int, ...], repeat: int, block_size: int
+) -> None:
+    """Time day 15's parallel search against the number of workers.
+
+    FILE is a day 15 input, and its full map is searched from the top left.
+    Speedups are relative to the serial search.
+    """
+    from ._bench import bench_workers
+
+    click.echo(f"{'workers':>7}  {'min (s)':>10}  {'speedup':>7}")
+    baseline = None
+    for result in bench_workers(file, workers, repeat=repeat, block_size=block_size):
+        baseline = baseline or result.min
+        workers_label = "serial" if result.workers is None else result.workers
+        click.echo(
+            f"{workers_label:>7}  {result.min:>10.6f}"
+            f"  {baseline / result.min:>7.2f}"
+        )
+
+
+@cli.command()
+@click.argument("day", type=click.IntRange(min=1, max=25))
+@click.argument("file", type=click.File("w"), default="-")
+@click.option(
+    "--scale",
+    type=click.IntRange(min=1),
+    help=(
+        "Size of the input. What this means for each day is shown by the "
+        "generators command."
+    ),
+)
+@click.option("--seed", type=int, default=0, show_default=True)
+def generate(day: int, file: IO[str], scale: int | None, seed: int) -> None:
+    """Write a synthetic input for DAY to FILE (stdout by default).
+
+    Inputs are deterministic for a given scale and seed.
+    """
+    import random
+
+    from ._generate import generators
+
+    if day not in solvers or day not in generators:
+        raise click.UsageError(f"No input generator for day {day}")
+
+    generator = generators[day]
+    generator.generate(file, scale or generator.default_scale, random.Random(seed))
+
+
+@cli.command("generators")
+def list_generators() -> None:
+    """Describe the input generators, including what SCALE means."""
+    from ._generate import generators
+
+    for day, generator in sorted(generators.items()):
+        click.secho(f"Day {day} (default scale {generator.default_scale})", bold=True)
+        click.echo(f"  {generator.description.splitlines()[0]}")
+
+
+@cli.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    envvar="AOC_SOCKET",
+    required=True,
+    help="Path of the Unix domain socket to listen on.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of worker processes. Defaults to CPU count.",
+)
+def serve(socket_path: Path, jobs: int | None) -> None:
+    """Keep solvers loaded and run them for clients, e.g. run --via.
+
+    Every day's module is imported up front so requests don't pay for
+    interpreter startup or imports.
+    """
+    from ._server import serve
+
+    try:
+        serve(socket_path, jobs)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
 
 
 def default_day() -> int:
@@ -77,11 +738,29 @@ def default_day() -> int:
 @cli.command()
 @click.argument("day", type=click.IntRange(min=1, max=25), default=default_day)
 @verbose
-def autorun(day: int, verbose: int) -> None:
-    try:
-        solve = solvers[day]
-    except KeyError:
+@timings
+@use_cache
+@profile_options
+@memory_options
+@solver_options
+def autorun(
+    day: int,
+    verbose: int,
+    timings: bool,
+    use_cache: bool,
+    profile: str | None,
+    profile_top: int,
+    profile_output: Path | None,
+    memory: bool,
+    max_memory: int | None,
+    memory_top: int,
+    engine: str | None,
+    workers: int | None,
+) -> None:
+    if day not in solvers:
         raise click.UsageError("Unimplemented!")
+    if set_solver_options(day, engine=engine, workers=workers):
+        use_cache = False
 
     input_path = f"input/{day:02d}.txt"
     try:
@@ -90,7 +769,48 @@ def autorun(day: int, verbose: int) -> None:
         raise click.UsageError(f"Input file does not exist: {input_path}")
 
     with file as fp:
-        solve(fp, verbose)
+        run_one(
+            day,
+            fp,
+            verbose,
+            timings,
+            use_cache,
+            make_profile_options(profile, profile_top, profile_output),
+            memory,
+            max_memory,
+            memory_top,
+        )
+
+
+@cli.group("cache")
+def cache_group() -> None:
+    """Manage cached results.
+
+    Results are stored in $AOC_CACHE_DIR, or aoc2021 in the user cache
+    directory.
+    """
+
+
+@cache_group.command()
+def clear() -> None:
+    """Remove all cached results."""
+    from ._cache import ResultCache
+
+    removed = ResultCache().clear()
+    click.echo(f"Removed {removed} cached result{'s' if removed != 1 else ''}")
+
+
+@cache_group.command()
+def info() -> None:
+    """Show where the cache is and how big it is."""
+    from ._cache import ResultCache
+    from ._memory import format_bytes
+
+    cache = ResultCache()
+    entries, size = cache.size()
+    click.echo(f"Directory: {cache.directory}")
+    click.echo(f"Entries: {entries}")
+    click.echo(f"Size: {format_bytes(size)} of {format_bytes(cache.max_size)}")
 
 
 MODULE_TEMPLATE = """\
@@ -106,8 +826,10 @@ def solve(file: IO[str], verbose: int) -> None:
 
 
 @cli.command()
-def prepare() -> None:
-    load_dotenv()
+@base_url
+@concurrency
+def prepare(base_url: str, concurrency: int) -> None:
+    cookies = session_cookies()
     input_dir = Path("input")
     package_dir = Path(__file__).parent
     expected_src_dir = package_dir.parent
@@ -128,34 +850,23 @@ def prepare() -> None:
 
     last_available_day = min(dt.date.today(), dt.date(2021, 12, 25)).day
 
-    try:
-        aoc_session = os.environ["AOC_SESSION"]
-    except KeyError:
-        raise click.UsageError(
-            "Set AOC_SESSION environment variable (or add to .env file)"
-        )
-    else:
-        cookies = dict(session=aoc_session)
-
-    with httpx.Client(cookies=cookies) as client:
+    if create_modules:
         for day in range(1, last_available_day + 1):
-            if create_modules:
-                module_file = package_dir / f"day{day:02d}.py"
-                try:
-                    with open(module_file, "x") as file:
-                        file.write(MODULE_TEMPLATE.format(day=day))
-                except FileExistsError:
-                    pass
-
-            input_file = input_dir / f"{day:02d}.txt"
+            module_file = package_dir / f"day{day:02d}.py"
             try:
-                with open(input_file, "x") as file:
-                    response = client.get(INPUT_URL.format(day=day))
-                    response.raise_for_status()
-                    file.write(response.text)
+                with open(module_file, "x") as file:
+                    file.write(MODULE_TEMPLATE.format(day=day))
             except FileExistsError:
                 pass
 
+    download_inputs(
+        list(range(1, last_available_day + 1)),
+        input_dir,
+        cookies,
+        base_url,
+        concurrency,
+    )
+
     if create_modules:
         with open(package_dir / "__init__.py", "r+") as file:
             lines = file.readlines()
@@ -172,12 +883,14 @@ def prepare() -> None:
                 output.append(line)
                 if re.match(r"# autogenerate start", line):
                     in_autogenerate = True
-                    # This formatting is set up to match what isort will reformat
+                    # This formatting is set up to match what black will reformat
                     # it as.
-                    output.append("from . import (\n")
+                    output.append("register_lazy(\n")
+                    output.append("    {\n")
                     for day in range(1, last_available_day + 1):
-                        output.append(f"    day{day:02d},\n")
-                    output.append(f")\n\n")
+                        output.append(f'        {day}: ".day{day:02d}",\n')
+                    output.append("    }\n")
+                    output.append(")\n")
 
             file.seek(0)
             file.truncate()
@@ -0,0 +1,170 @@
+import contextlib
+import io
+import os
+import platform
+import statistics
+import time
+import traceback
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from ._memory import peak_rss
+from ._profile import ProfileOptions, make_profiler
+from ._registry import solvers
+from ._runner import solve_timed
+
+
+@dataclass
+class BenchResult:
+    day: int
+    timings: list[float] = field(default_factory=list)
+    phases: dict[str, list[float]] = field(default_factory=dict)
+    peak_rss: int | None = None
+    error: str | None = None
+    profile: str | None = None
+
+    @property
+    def min(self) -> float:
+        return min(self.timings)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+    @property
+    def p95(self) -> float:
+        if len(self.timings) < 2:
+            return self.timings[0]
+        return statistics.quantiles(self.timings, n=20, method="inclusive")[-1]
+
+    def as_dict(self) -> dict[str, Any]:
+        result = asdict(self)
+        if self.timings:
+            result.update(min=self.min, median=self.median, p95=self.p95)
+        return result
+
+
+def bench_day(
+    day: int,
+    path: Path,
+    repeat: int,
+    warmup: int,
+    profile: ProfileOptions | None = None,
+) -> BenchResult:
+    """Time `repeat` runs of a solver after `warmup` untimed runs.
+
+    The input is read once up front so that only the solver itself is timed,
+    and anything it prints is discarded. If `profile` is given, the timed runs
+    are profiled together.
+    """
+    result = BenchResult(day)
+    profiler = make_profiler(profile.kind) if profile is not None else None
+    try:
+        solve = solvers[day]
+        text = path.read_text()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(warmup):
+                solve(io.StringIO(text), 0)
+
+            for _ in range(repeat):
+                with profiler or contextlib.nullcontext():
+                    start = time.perf_counter()
+                    phases = solve_timed(solve, io.StringIO(text), 0)
+                    result.timings.append(time.perf_counter() - start)
+                for name, seconds in phases.items():
+                    result.phases.setdefault(name, []).append(seconds)
+    except Exception:
+        result.error = traceback.format_exc()
+
+    if profile is not None and profiler is not None:
+        result.profile = profiler.report(profile.top)
+        if profile.output is not None:
+            profiler.dump(Path(str(profile.output).format(day=day)))
+
+    result.peak_rss = peak_rss()
+    return result
+
+
+def bench_days(
+    days: Iterable[int],
+    *,
+    input_dir: Path,
+    repeat: int,
+    warmup: int,
+    profile: ProfileOptions | None = None,
+) -> Iterator[BenchResult]:
+    """Benchmark each day sequentially, each in a fresh worker process.
+
+    Days are not run concurrently so they don't compete for CPU, and a fresh
+    process per day keeps peak RSS from being inherited from earlier days.
+    """
+    for day in days:
+        path = input_dir / f"{day:02d}.txt"
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            yield executor.submit(
+                bench_day, day, path, repeat, warmup, profile
+            ).result()
+
+
+def report(results: list[BenchResult], *, repeat: int, warmup: int) -> dict[str, Any]:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        aoc_version = version("aoc2021")
+    except PackageNotFoundError:
+        aoc_version = None
+
+    return dict(
+        version=aoc_version,
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        platform=platform.platform(),
+        timestamp=time.time(),
+        repeat=repeat,
+        warmup=warmup,
+        days=[result.as_dict() for result in results],
+    )
+
+
+@dataclass
+class ScalingResult:
+    workers: int | None
+    timings: list[float] = field(default_factory=list)
+
+    @property
+    def min(self) -> float:
+        return min(self.timings)
+
+
+def bench_workers(
+    path: Path, workers: Iterable[int], *, repeat: int, block_size: int
+) -> Iterator[ScalingResult]:
+    """Time day 15's search across its full map with each number of workers.
+
+    The serial Dial search is timed first, with `workers` of None, as the
+    baseline for speedups. Every search runs from the top left to every node.
+    """
+    from . import day15
+
+    with path.open() as file:
+        grid = day15.kylo_ren_more.gif(day15.parse(file))
+    start = (0, 0)
+
+    baseline = ScalingResult(None)
+    risks = grid.padded_risks()
+    for _ in range(repeat):
+        began = time.perf_counter()
+        day15.dial_search(risks, grid.stride, grid.node(start))
+        baseline.timings.append(time.perf_counter() - began)
+    yield baseline
+
+    for count in workers:
+        result = ScalingResult(count)
+        for _ in range(repeat):
+            began = time.perf_counter()
+            day15.parallel_search(grid, start, workers=count, block_size=block_size)
+            result.timings.append(time.perf_counter() - began)
+        yield result
@@ -0,0 +1,112 @@
+import hashlib
+import importlib.util
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from ._files import write_atomic
+from ._registry import solvers
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+def default_directory() -> Path:
+    if directory := os.environ.get("AOC_CACHE_DIR"):
+        return Path(directory)
+
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "aoc2021"
+
+
+def source_digest(day: int) -> str:
+    """SHA-256 of the source of the module registering `day`.
+
+    The module is located without importing it, so that cache hits don't pay
+    for the module's imports.
+    """
+    spec = importlib.util.find_spec(solvers.module(day))
+    if spec is None or spec.origin is None:
+        raise LookupError(f"Can't find source for day {day}")
+    return hashlib.sha256(Path(spec.origin).read_bytes()).hexdigest()
+
+
+@dataclass
+class CachedResult:
+    output: str
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+class ResultCache:
+    """Solver output keyed by the input and the source of the day's module.
+
+    Entries are stored one file per key. Reading an entry updates its
+    modification time, and the least recently used entries are removed when
+    the total size exceeds `max_size` bytes.
+    """
+
+    def __init__(
+        self, directory: Path | None = None, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.directory = directory or default_directory()
+        self.max_size = max_size
+
+    def key(self, day: int, data: bytes) -> str:
+        h = hashlib.sha256()
+        h.update(f"{day}\0".encode())
+        h.update(hashlib.sha256(data).digest())
+        h.update(source_digest(day).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> CachedResult | None:
+        path = self._path(key)
+        try:
+            with open(path) as fp:
+                result = CachedResult(**json.load(fp))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return result
+
+    def put(self, key: str, result: CachedResult) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        write_atomic(self._path(key), json.dumps(asdict(result)))
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self) -> None:
+        """Remove least recently used entries until within `max_size`."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> int:
+        entries = self._entries()
+        for _, _, path in entries:
+            path.unlink(missing_ok=True)
+        return len(entries)
+
+    def size(self) -> tuple[int, int]:
+        """Return the number of entries and their total size in bytes."""
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
@@ -0,0 +1,81 @@
+import asyncio
+from collections.abc import Iterable
+from pathlib import Path
+
+import httpx
+
+from ._files import write_atomic
+
+BASE_URL = "https://adventofcode.com"
+INPUT_PATH = "/2021/day/{day}/input"
+
+
+async def fetch_input(
+    client: httpx.AsyncClient,
+    day: int,
+    *,
+    retries: int = 3,
+    backoff: float = 0.5,
+) -> str:
+    """Fetch the input for `day`, retrying server and connection errors.
+
+    Client errors (e.g. a day that isn't unlocked yet) are raised immediately.
+    """
+    for attempt in range(retries + 1):
+        try:
+            response = await client.get(INPUT_PATH.format(day=day))
+            if response.status_code < 500:
+                response.raise_for_status()
+                return response.text
+            if attempt == retries:
+                response.raise_for_status()
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+
+        await asyncio.sleep(backoff * 2 ** attempt)
+
+    raise AssertionError("unreachable")
+
+
+async def fetch_inputs(
+    days: Iterable[int],
+    *,
+    input_dir: Path,
+    cookies: dict[str, str],
+    base_url: str = BASE_URL,
+    concurrency: int = 5,
+    retries: int = 3,
+    backoff: float = 0.5,
+) -> dict[int, BaseException | None]:
+    """Download inputs for `days` into `input_dir` as ``NN.txt``.
+
+    Inputs already present in `input_dir` are not downloaded again. Returns
+    the exception for each day that failed, or None for success.
+    """
+    input_dir.mkdir(parents=True, exist_ok=True)
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, cookies=cookies, limits=limits
+    ) as client:
+
+        async def fetch(day: int) -> None:
+            path = input_dir / f"{day:02d}.txt"
+            if path.exists():
+                return
+
+            async with semaphore:
+                text = await fetch_input(client, day, retries=retries, backoff=backoff)
+            write_atomic(path, text)
+
+        days = list(days)
+        results = await asyncio.gather(
+            *(fetch(day) for day in days), return_exceptions=True
+        )
+
+    return {
+        day: result if isinstance(result, BaseException) else None
+        for day, result in zip(days, results)
+    }
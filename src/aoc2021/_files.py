@@ -0,0 +1,31 @@
+import os
+import tempfile
+from collections.abc import Iterable
+from itertools import islice
+from pathlib import Path
+from typing import IO
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write `text` to `path` so that readers never see a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", text=True)
+    try:
+        # mkstemp only allows the owner to read and write, where a new file
+        # would normally follow the umask.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.fchmod(fd, 0o666 & ~umask)
+        with os.fdopen(fd, "w") as file:
+            file.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_lines(file: IO[str], lines: Iterable[str], chunk_size: int = 10000) -> None:
+    """Write lines to `file` in chunks, rather than one call per line."""
+    it = iter(lines)
+    while chunk := list(islice(it, chunk_size)):
+        file.write("\n".join(chunk))
+        file.write("\n")
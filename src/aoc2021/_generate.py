@@ -0,0 +1,378 @@
+"""Deterministic generators for puzzle inputs of arbitrary size.
+
+Each generator writes a valid input for its day. What `scale` means depends on
+the day, and is described by each generator's docstring.
+"""
+
+import random
+import string
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import IO, Callable
+
+import numpy as np
+from numpy.typing import NDArray
+
+from ._files import write_lines
+
+GeneratorFunction = Callable[[IO[str], int, random.Random], None]
+
+
+@dataclass(frozen=True)
+class InputGenerator:
+    generate: GeneratorFunction
+    default_scale: int
+
+    @property
+    def description(self) -> str:
+        return (self.generate.__doc__ or "").strip()
+
+
+generators: dict[int, InputGenerator] = dict()
+
+
+def generator(
+    *, day: int, default_scale: int
+) -> Callable[[GeneratorFunction], GeneratorFunction]:
+    def decorator(fn: GeneratorFunction) -> GeneratorFunction:
+        if day in generators:
+            raise ValueError(f"Day {day} already has a generator")
+        generators[day] = InputGenerator(fn, default_scale)
+        return fn
+
+    return decorator
+
+
+def numpy_rng(rng: random.Random) -> np.random.Generator:
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+def write_digit_rows(file: IO[str], rows: NDArray[np.int_]) -> None:
+    for row in (rows + ord("0")).astype(np.uint8):
+        file.write(row.tobytes().decode())
+        file.write("\n")
+
+
+def write_random_digits(
+    file: IO[str], scale: int, low: int, high: int, rng: random.Random
+) -> None:
+    """Write a SCALE x SCALE grid of digits from `low` to `high` inclusive."""
+    nprng = numpy_rng(rng)
+    rows_per_chunk = max(1, 10 ** 6 // max(1, scale))
+    for y in range(0, scale, rows_per_chunk):
+        rows = min(rows_per_chunk, scale - y)
+        write_digit_rows(file, nprng.integers(low, high + 1, size=(rows, scale)))
+
+
+@generator(day=1, default_scale=2000)
+def depths(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE depth measurements."""
+
+    def walk() -> Iterator[str]:
+        depth = rng.randrange(100, 200)
+        for _ in range(scale):
+            depth = max(0, depth + rng.randint(-10, 20))
+            yield str(depth)
+
+    write_lines(file, walk())
+
+
+@generator(day=2, default_scale=1000)
+def commands(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE submarine commands."""
+
+    def generate() -> Iterator[str]:
+        aim = 0
+        for _ in range(scale):
+            n = rng.randint(1, 9)
+            match rng.choice(["forward", "down", "up"]):
+                case "up" if aim >= n:
+                    aim -= n
+                    yield f"up {n}"
+                case "forward":
+                    yield f"forward {n}"
+                case _:
+                    aim += n
+                    yield f"down {n}"
+
+    write_lines(file, generate())
+
+
+@generator(day=3, default_scale=1000)
+def diagnostic_report(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE distinct binary numbers, with at least 12 bits each."""
+    width = max(12, (scale - 1).bit_length() + 1)
+    numbers = rng.sample(range(2 ** width), scale)
+    write_lines(file, (f"{n:0{width}b}" for n in numbers))
+
+
+@generator(day=4, default_scale=100)
+def bingo(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE bingo boards."""
+    numbers = list(range(100))
+    rng.shuffle(numbers)
+    file.write(",".join(map(str, numbers)))
+    file.write("\n")
+
+    for _ in range(scale):
+        board = rng.sample(range(100), 25)
+        file.write("\n")
+        for i in range(0, 25, 5):
+            file.write(" ".join(f"{n:>2}" for n in board[i : i + 5]))
+            file.write("\n")
+
+
+@generator(day=5, default_scale=500)
+def vents(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE lines of vents, with coordinates up to 2 * SCALE (at least 1000)."""
+    span = max(1000, 2 * scale)
+    directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+    def generate() -> Iterator[str]:
+        for _ in range(scale):
+            x1 = rng.randrange(span)
+            y1 = rng.randrange(span)
+            dx, dy = rng.choice(directions)
+            # Limit the length so that the line stays within the span.
+            limit = span
+            for start, d in [(x1, dx), (y1, dy)]:
+                if d > 0:
+                    limit = min(limit, span - 1 - start)
+                elif d < 0:
+                    limit = min(limit, start)
+            length = rng.randint(0, limit)
+            x2 = x1 + dx * length
+            y2 = y1 + dy * length
+            if rng.random() < 0.5:
+                x1, y1, x2, y2 = x2, y2, x1, y1
+            yield f"{x1},{y1} -> {x2},{y2}"
+
+    write_lines(file, generate())
+
+
+@generator(day=6, default_scale=300)
+def lanternfish(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE lanternfish."""
+    file.write(",".join(str(rng.randint(1, 5)) for _ in range(scale)))
+    file.write("\n")
+
+
+@generator(day=7, default_scale=1000)
+def crabs(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE crabs, with positions up to 2 * SCALE (at least 2000)."""
+    span = max(2000, 2 * scale)
+    # Most positions are small, like the real puzzle input.
+    positions = (int(rng.expovariate(4 / span)) % span for _ in range(scale))
+    file.write(",".join(map(str, positions)))
+    file.write("\n")
+
+
+SEGMENTS = [
+    "abcefg",
+    "cf",
+    "acdeg",
+    "acdfg",
+    "bcdf",
+    "abdfg",
+    "abdefg",
+    "acf",
+    "abcdefg",
+    "abcdfg",
+]
+
+
+@generator(day=8, default_scale=200)
+def displays(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE seven segment displays."""
+
+    def scramble(wiring: dict[str, str], digit: int) -> str:
+        signals = [wiring[segment] for segment in SEGMENTS[digit]]
+        rng.shuffle(signals)
+        return "".join(signals)
+
+    def generate() -> Iterator[str]:
+        for _ in range(scale):
+            wiring = dict(zip("abcdefg", rng.sample("abcdefg", 7)))
+            patterns = [scramble(wiring, digit) for digit in range(10)]
+            rng.shuffle(patterns)
+            output = [scramble(wiring, rng.randrange(10)) for _ in range(4)]
+            yield f"{' '.join(patterns)} | {' '.join(output)}"
+
+    write_lines(file, generate())
+
+
+@generator(day=9, default_scale=100)
+def heightmap(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE x SCALE heightmap.
+
+    Basins are rectangles separated by walls of 9s. Heights increase with
+    distance from a single low point in each basin, so every basin has
+    exactly one low point. The map is written one band of rows at a time.
+    """
+    xs = np.arange(scale)
+    y = 0
+    while y < scale:
+        band_height = min(rng.randint(2, 12), scale - y)
+
+        # Walls between basins in this band, and each basin's low point.
+        wall = np.zeros(scale, dtype=bool)
+        low_x = np.zeros(scale, dtype=int)
+        low_y = np.zeros(scale, dtype=int)
+        x = 0
+        while x < scale:
+            width = min(rng.randint(2, 12), scale - x)
+            low_x[x : x + width] = x + rng.randrange(width)
+            low_y[x : x + width] = rng.randrange(band_height)
+            x += width
+            if x < scale:
+                wall[x] = True
+                x += 1
+
+        ys = np.arange(band_height)[:, np.newaxis]
+        band = np.minimum(8, np.abs(xs - low_x) + np.abs(ys - low_y))
+        band[:, wall] = 9
+        write_digit_rows(file, band)
+
+        y += band_height
+        if y < scale:
+            write_digit_rows(file, np.full((1, scale), 9))
+            y += 1
+
+
+@generator(day=10, default_scale=100)
+def navigation_subsystem(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE lines of chunks, each either corrupted or incomplete.
+
+    The number of incomplete lines is always odd, so there is a middle
+    completion score.
+    """
+    pairs = {"(": ")", "[": "]", "{": "}", "<": ">"}
+    corrupted = [rng.random() < 0.5 for _ in range(scale)]
+    if scale and sum(not c for c in corrupted) % 2 == 0:
+        corrupted[0] = not corrupted[0]
+
+    def line(corrupt: bool) -> str:
+        length = rng.randint(20, 110)
+        chars: list[str] = []
+        stack: list[str] = []
+        while len(chars) < length or not stack:
+            if stack and rng.random() < 0.45:
+                chars.append(stack.pop())
+            else:
+                opening = rng.choice(list(pairs))
+                chars.append(opening)
+                stack.append(pairs[opening])
+
+        if corrupt:
+            wrong = [c for c in pairs.values() if c != stack[-1]]
+            chars.append(rng.choice(wrong))
+            # The rest of the line doesn't matter after the first error.
+            chars.extend(rng.choice(list(pairs)) for _ in range(rng.randrange(10)))
+        return "".join(chars)
+
+    write_lines(file, (line(corrupt) for corrupt in corrupted))
+
+
+@generator(day=11, default_scale=10)
+def octopuses(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE x SCALE grid of octopus energy levels.
+
+    Unlike puzzle inputs, random grids often never synchronise.
+    """
+    write_random_digits(file, scale, 0, 9, rng)
+
+
+@generator(day=12, default_scale=6)
+def caves(file: IO[str], scale: int, rng: random.Random) -> None:
+    """Cave system with SCALE small caves.
+
+    Big caves are only ever connected to small caves, so the number of paths
+    is finite. It grows very quickly with SCALE.
+    """
+    name_length = 2
+    while 26 ** name_length < 4 * scale:
+        name_length += 1
+
+    small: list[str] = []
+    while len(small) < scale:
+        name = "".join(rng.choices(string.ascii_lowercase, k=name_length))
+        if name not in small and name not in {"start", "end"}:
+            small.append(name)
+    big = [name.upper() for name in rng.sample(small, max(1, scale // 3))]
+
+    edges: set[tuple[str, str]] = set()
+
+    def connect(a: str, b: str) -> None:
+        edges.add((a, b) if rng.random() < 0.5 else (b, a))
+
+    for cave in big:
+        for neighbour in rng.sample(small, min(len(small), rng.randint(2, 4))):
+            connect(cave, neighbour)
+
+    for i, cave in enumerate(small[1:], start=1):
+        connect(cave, rng.choice(small[:i]))
+
+    for special in ["start", "end"]:
+        for neighbour in rng.sample(small + big, min(scale, rng.randint(1, 3))):
+            connect(special, neighbour)
+
+    write_lines(file, (f"{a}-{b}" for a, b in sorted(edges)))
+
+
+@generator(day=13, default_scale=800)
+def transparent_paper(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE dots, which fold into a random 39 x 6 pattern after 12 folds."""
+    width, height = 40, 6
+    final = [
+        (x, y)
+        for x in range(width - 1)
+        for y in range(height)
+        if x % 5 != 4 and rng.random() < 0.5
+    ] or [(0, 0)]
+
+    axes = ["x", "y"] * 6
+    rng.shuffle(axes)
+
+    # Work backwards from the final size to find where each fold happens.
+    folds: list[tuple[str, int]] = []
+    w, h = width - 1, height
+    for axis in reversed(axes):
+        if axis == "x":
+            folds.append((axis, w))
+            w = 2 * w + 1
+        else:
+            folds.append((axis, h))
+            h = 2 * h + 1
+    folds.reverse()
+
+    dots: set[tuple[int, int]] = set()
+    for _ in range(scale):
+        x, y = rng.choice(final)
+        for axis, pos in reversed(folds):
+            if rng.random() < 0.5:
+                if axis == "x":
+                    x = 2 * pos - x
+                else:
+                    y = 2 * pos - y
+        dots.add((x, y))
+
+    write_lines(file, (f"{x},{y}" for x, y in sorted(dots)))
+    file.write("\n")
+    write_lines(file, (f"fold along {axis}={pos}" for axis, pos in folds))
+
+
+@generator(day=14, default_scale=20)
+def polymer(file: IO[str], scale: int, rng: random.Random) -> None:
+    """Polymer template of SCALE elements, with rules for every pair."""
+    elements = "BCFHKNOPSV"
+    file.write("".join(rng.choices(elements, k=max(2, scale))))
+    file.write("\n\n")
+    write_lines(
+        file, (f"{a}{b} -> {rng.choice(elements)}" for a in elements for b in elements)
+    )
+
+
+@generator(day=15, default_scale=100)
+def chiton_risk(file: IO[str], scale: int, rng: random.Random) -> None:
+    """SCALE x SCALE map of risk levels."""
+    write_random_digits(file, scale, 1, 9, rng)
@@ -0,0 +1,149 @@
+import _thread
+import io
+import sys
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+from types import TracebackType
+
+
+def peak_rss() -> int | None:
+    """Peak resident set size of this process in bytes, if available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def format_bytes(n: int | None) -> str:
+    if n is None:
+        return "n/a"
+    size = float(n)
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            break
+        size /= 1024
+    return f"{size:.1f} {unit}"
+
+
+class MemoryBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class MemoryReport:
+    peak: int = 0
+    peak_rss: int | None = None
+    # Traced memory when the allocation sites were captured.
+    sites_at: int = 0
+    sites: list[tuple[str, int, int]] = field(default_factory=list)
+
+    def format(self, top: int) -> str:
+        stream = io.StringIO()
+        stream.write(f"Peak traced memory: {format_bytes(self.peak)}\n")
+        stream.write(f"Peak RSS: {format_bytes(self.peak_rss)}\n")
+        stream.write(
+            f"Top allocation sites (with {format_bytes(self.sites_at)} traced):\n"
+        )
+        for site, size, count in self.sites[:top]:
+            stream.write(f"{format_bytes(size):>12} {count:>10} blocks  {site}\n")
+        return stream.getvalue()
+
+
+class MemoryTracer:
+    """Trace allocations made inside its ``with`` block using tracemalloc.
+
+    A background thread polls the traced memory. Allocation sites are
+    captured whenever usage grows by more than 10% since the last capture,
+    so that they reflect the peak rather than whatever is still alive at the
+    end. If `max_memory` bytes is exceeded, the main thread is interrupted
+    and MemoryBudgetExceeded is raised from the ``with`` block.
+    """
+
+    def __init__(
+        self, max_memory: int | None = None, *, interval: float = 0.01
+    ) -> None:
+        self.max_memory = max_memory
+        self.interval = interval
+        self.report = MemoryReport()
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._exceeded = False
+        # Whether the with block is still running, so may be interrupted.
+        self._active = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def _capture(self, current: int) -> None:
+        self._snapshot = tracemalloc.take_snapshot()
+        self.report.sites_at = current
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            current, _ = tracemalloc.get_traced_memory()
+            if self.max_memory is not None and current > self.max_memory:
+                with self._lock:
+                    if self._active:
+                        self._exceeded = True
+                        _thread.interrupt_main()
+                return
+
+            if current > 1.1 * self.report.sites_at:
+                self._capture(current)
+
+    def __enter__(self) -> None:
+        tracemalloc.start()
+        self._active = True
+        self._thread.start()
+
+    def _finish(self) -> None:
+        """Stop tracing and fill in the report. This can safely run twice."""
+        self._stop.set()
+        self._thread.join()
+        if tracemalloc.is_tracing():
+            current, self.report.peak = tracemalloc.get_traced_memory()
+            if self._snapshot is None or current > self.report.sites_at:
+                self._capture(current)
+            tracemalloc.stop()
+
+        if self._snapshot is not None:
+            stats = self._snapshot.filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            ).statistics("lineno")
+            self.report.sites = [
+                (str(stat.traceback), stat.size, stat.count) for stat in stats
+            ]
+        self.report.peak_rss = peak_rss()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        try:
+            with self._lock:
+                self._active = False
+            try:
+                self._finish()
+            except KeyboardInterrupt:
+                # The watcher's interrupt can arrive after the block has ended,
+                # in which case it's only the budget being exceeded.
+                if not self._exceeded:
+                    raise
+                self._finish()
+        finally:
+            self._stop.set()
+            tracemalloc.stop()
+
+        if self.max_memory is not None and (
+            self._exceeded or self.report.peak > self.max_memory
+        ):
+            raise MemoryBudgetExceeded(
+                f"Traced memory reached {format_bytes(self.report.peak)}, over "
+                f"the budget of {format_bytes(self.max_memory)}"
+            ) from exc
@@ -0,0 +1,153 @@
+import cProfile
+import io
+import pstats
+import signal
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from types import CodeType, FrameType, TracebackType
+from typing import Any, Protocol
+
+
+class Profiler(Protocol):
+    """Profiles the code inside its ``with`` block.
+
+    The block may be entered more than once and the results accumulate.
+    """
+
+    def __enter__(self) -> None:
+        ...
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        ...
+
+    def report(self, top: int) -> str:
+        ...
+
+    def dump(self, path: Path) -> None:
+        ...
+
+
+@dataclass(frozen=True)
+class ProfileOptions:
+    kind: str
+    top: int = 20
+    output: Path | None = None
+
+
+class DeterministicProfiler:
+    """cProfile based profiler, which dumps .pstats files."""
+
+    def __init__(self) -> None:
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self) -> None:
+        self.profiler.enable()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.profiler.disable()
+
+    def report(self, top: int) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.strip_dirs()
+        stream.write("By cumulative time:\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        stream.write("By self time:\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+        return stream.getvalue()
+
+    def dump(self, path: Path) -> None:
+        self.profiler.dump_stats(path)
+
+
+def code_label(code: CodeType) -> str:
+    # Same format as pstats, but without semicolons which separate frames in
+    # the collapsed stack format.
+    return f"{code.co_filename}:{code.co_firstlineno}({code.co_name})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Statistical profiler which samples the stack on SIGPROF.
+
+    Only frames below the one that entered the ``with`` block are recorded.
+    Results can be dumped as collapsed stacks for flamegraph tools. This only
+    works on Unix, in the main thread.
+    """
+
+    def __init__(self, interval: float = 0.001) -> None:
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self._root: FrameType | None = None
+        self._previous_handler: Any = None
+
+    def _sample(self, signum: int, frame: FrameType | None) -> None:
+        stack = []
+        while frame is not None and frame is not self._root:
+            stack.append(code_label(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+
+    def __enter__(self) -> None:
+        self._root = sys._getframe(1)
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler)
+        self._root = None
+
+    def report(self, top: int) -> str:
+        total = sum(self.stacks.values())
+        self_samples: Counter[str] = Counter()
+        cumulative_samples: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            self_samples[stack[-1]] += count
+            for label in set(stack):
+                cumulative_samples[label] += count
+
+        stream = io.StringIO()
+        stream.write(f"{total} samples at {self.interval * 1000:g} ms intervals\n")
+        for title, samples in [
+            ("By cumulative time", cumulative_samples),
+            ("By self time", self_samples),
+        ]:
+            stream.write(f"\n{title}:\n{'samples':>9} {'%':>6}  function\n")
+            for label, count in samples.most_common(top):
+                percent = 100 * count / total
+                stream.write(f"{count:>9} {percent:>6.1f}  {label}\n")
+        return stream.getvalue()
+
+    def dump(self, path: Path) -> None:
+        with open(path, "w") as file:
+            for stack, count in self.stacks.items():
+                file.write(f"{';'.join(stack)} {count}\n")
+
+
+def make_profiler(kind: str) -> Profiler:
+    match kind:
+        case "cprofile":
+            return DeterministicProfiler()
+        case "sampling":
+            return SamplingProfiler()
+        case _:
+            raise ValueError(f"Unknown profiler: {kind}")
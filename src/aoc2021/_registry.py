@@ -1,4 +1,10 @@
-from typing import IO, Callable, Protocol
+import importlib
+import importlib.util
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Generic, Protocol, TypeVar
+
+T = TypeVar("T")
 
 
 class Solver(Protocol):
@@ -6,14 +12,88 @@ class Solver(Protocol):
         ...
 
 
-solvers: dict[int, Solver] = dict()
+@dataclass(frozen=True)
+class Phased(Generic[T]):
+    """A solver split into separate phases which return answers.
+
+    The input is parsed once and the parsed value is shared by both parts, so
+    that runners can time each phase separately. Calling it behaves like any
+    other solver and prints the answers.
+    """
+
+    parse: Callable[[IO[str]], T]
+    part1: Callable[[T], object]
+    part2: Callable[[T], object]
+
+    def __call__(self, file: IO[str], verbose: int) -> None:
+        parsed = self.parse(file)
+        print("Part 1:", self.part1(parsed))
+        print("Part 2:", self.part2(parsed))
+
+
+class Registry(Mapping[int, Solver]):
+    """Solvers by day.
+
+    Days can be registered lazily with the name of the module that registers
+    them, which is only imported the first time that day is looked up. This
+    keeps startup cheap when only one day (and its dependencies) is needed.
+    """
+
+    def __init__(self) -> None:
+        self._solvers: dict[int, Solver] = dict()
+        self._modules: dict[int, str] = dict()
+
+    def __getitem__(self, day: int) -> Solver:
+        if day not in self._solvers and day in self._modules:
+            importlib.import_module(self._modules[day], __package__)
+        return self._solvers[day]
+
+    def __contains__(self, day: object) -> bool:
+        return day in self._solvers or day in self._modules
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self._solvers.keys() | self._modules.keys()))
+
+    def __len__(self) -> int:
+        return len(self._solvers.keys() | self._modules.keys())
+
+    def module(self, day: int) -> str:
+        """Return the absolute name of the module which registers `day`."""
+        if day in self._modules:
+            return importlib.util.resolve_name(self._modules[day], __package__)
+
+        solver = self[day]
+        fn = solver.parse if isinstance(solver, Phased) else solver
+        return str(getattr(fn, "__module__"))
+
+    def add(self, day: int, solver: Solver) -> None:
+        if day in self._solvers:
+            raise ValueError(f"Day {day} is already registered")
+        self._solvers[day] = solver
+
+    def add_lazy(self, day: int, module: str) -> None:
+        if day in self:
+            raise ValueError(f"Day {day} is already registered")
+        self._modules[day] = module
+
+
+solvers = Registry()
+
+# Choices of implementation for the solvers that have them, such as "engine"
+# for day 5, set from the command line. Solvers use their own default for any
+# that aren't set.
+options: dict[str, Any] = dict()
 
 
 def register(*, day: int) -> Callable[[Solver], Solver]:
     def decorator(fn: Solver) -> Solver:
-        if day in solvers:
-            raise ValueError(f"Day {day} is already registered")
-        solvers[day] = fn
+        solvers.add(day, fn)
         return fn
 
     return decorator
+
+
+def register_lazy(modules: Mapping[int, str]) -> None:
+    """Register modules (relative to this package) to import on demand."""
+    for day, module in modules.items():
+        solvers.add_lazy(day, module)
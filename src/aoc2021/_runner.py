@@ -0,0 +1,197 @@
+import contextlib
+import io
+import sys
+import time
+import traceback
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO
+
+from ._cache import CachedResult, ResultCache
+from ._registry import Phased, Solver, solvers
+
+
+@dataclass(frozen=True)
+class DayResult:
+    day: int
+    output: str
+    error: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def input_path(day: int, input_dir: Path = Path("input")) -> Path:
+    return input_dir / f"{day:02d}.txt"
+
+
+def solve_timed(solve: Solver, file: IO[str], verbose: int) -> dict[str, float]:
+    """Run `solve`, printing its answers, and return the wall time per phase.
+
+    Phased solvers are timed as "parse", "part1" and "part2", sharing a single
+    parse between both parts. Other solvers are timed as a single "solve"
+    phase. Printing the answers isn't included in the timings.
+    """
+    timings: dict[str, float] = dict()
+    if not isinstance(solve, Phased):
+        start = time.perf_counter()
+        solve(file, verbose)
+        timings["solve"] = time.perf_counter() - start
+        return timings
+
+    start = time.perf_counter()
+    parsed = solve.parse(file)
+    timings["parse"] = time.perf_counter() - start
+
+    for n, part in enumerate([solve.part1, solve.part2], start=1):
+        start = time.perf_counter()
+        answer = part(parsed)
+        timings[f"part{n}"] = time.perf_counter() - start
+        print(f"Part {n}:", answer)
+
+    return timings
+
+
+class Tee(io.TextIOBase):
+    def __init__(self, *streams: IO[str]) -> None:
+        self.streams = streams
+
+    def write(self, s: str) -> int:
+        for stream in self.streams:
+            stream.write(s)
+        return len(s)
+
+    def flush(self) -> None:
+        for stream in self.streams:
+            stream.flush()
+
+
+def solve_cached(
+    day: int,
+    file: IO[str],
+    verbose: int,
+    cache: ResultCache | None,
+    solve: Solver | None = None,
+) -> tuple[dict[str, float], bool]:
+    """Like `solve_timed` for a registered day, but using `cache`.
+
+    Output is printed as the solver runs and stored for next time. Verbose
+    runs are never cached. Returns the phase timings, and whether they came
+    from the cache. Unless the day's `solve` is passed in, its module is only
+    imported if it has to run.
+    """
+    if cache is None or verbose:
+        return solve_timed(solve or solvers[day], file, verbose), False
+
+    text = file.read()
+    key = cache.key(day, text.encode())
+    if (result := cache.get(key)) is not None:
+        sys.stdout.write(result.output)
+        return result.timings, True
+
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(Tee(sys.stdout, buffer)):
+        timings = solve_timed(solve or solvers[day], io.StringIO(text), verbose)
+
+    cache.put(key, CachedResult(buffer.getvalue(), timings))
+    return timings, False
+
+
+def run_day(day: int, path: Path, verbose: int) -> DayResult:
+    """Run the solver for `day` on `path`, capturing everything it prints.
+
+    Exceptions are caught and returned so that a single failing solver can't
+    take down the other days when run in a process pool.
+    """
+    try:
+        file = open(path)
+    except FileNotFoundError:
+        return DayResult(day, "", f"Input file does not exist: {path}\n")
+
+    with file as fp:
+        return run_file(day, fp, verbose)
+
+
+def run_file(day: int, file: IO[str], verbose: int) -> DayResult:
+    buffer = io.StringIO()
+    try:
+        solve = solvers[day]
+        with contextlib.redirect_stdout(buffer):
+            timings = solve_timed(solve, file, verbose)
+    except Exception:
+        return DayResult(day, buffer.getvalue(), traceback.format_exc())
+
+    return DayResult(day, buffer.getvalue(), timings=timings)
+
+
+def run_input(day: int, text: str, verbose: int) -> DayResult:
+    return run_file(day, io.StringIO(text), verbose)
+
+
+def _run_isolated(day: int, path: Path, verbose: int) -> DayResult:
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(run_day, day, path, verbose).result()
+        except BrokenProcessPool:
+            return DayResult(day, "", "Worker process terminated abruptly\n")
+
+
+def run_days(
+    days: Iterable[int],
+    *,
+    input_dir: Path = Path("input"),
+    verbose: int = 0,
+    jobs: int | None = None,
+    cache: ResultCache | None = None,
+) -> Iterator[DayResult]:
+    """Run each day in a worker process, yielding results in day order.
+
+    All days are submitted up front, so total wall time is bounded by the
+    slowest day rather than the sum of all of them. Days found in `cache` are
+    not run at all, and successful results are added to it.
+    """
+    from concurrent.futures import Future, ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    if verbose:
+        cache = None
+
+    keys: dict[int, str] = dict()
+    pending: dict[int, Future[DayResult] | DayResult] = dict()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for day in sorted(days):
+            path = input_path(day, input_dir)
+            if cache is not None and path.exists():
+                keys[day] = cache.key(day, path.read_text().encode())
+                if (cached := cache.get(keys[day])) is not None:
+                    pending[day] = DayResult(
+                        day, cached.output, timings=cached.timings, cached=True
+                    )
+                    continue
+
+            pending[day] = executor.submit(run_day, day, path, verbose)
+
+        for day, future in pending.items():
+            if isinstance(future, DayResult):
+                yield future
+                continue
+
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # A worker died without raising (e.g. segfault or os._exit)
+                # which breaks every outstanding future. Retry each affected
+                # day on its own so only the culprit is reported as failed.
+                result = _run_isolated(day, input_path(day, input_dir), verbose)
+
+            if cache is not None and result.ok and day in keys:
+                cache.put(keys[day], CachedResult(result.output, result.timings))
+
+            yield result
@@ -0,0 +1,160 @@
+"""A daemon which keeps solvers loaded and runs them for clients.
+
+Clients connect to a Unix domain socket and send one JSON object per line::
+
+    {"id": 1, "day": 1, "input": "199\\n200\\n...", "verbose": 0}
+
+Requests on one connection are solved concurrently by a pool of worker
+processes, and each response is sent back as a line as soon as it's ready,
+so responses may arrive in a different order to the requests::
+
+    {"id": 1, "day": 1, "output": "Part 1: 7\\n...", "error": null, ...}
+"""
+
+import asyncio
+import json
+import signal
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from ._registry import solvers
+from ._runner import DayResult, run_input
+
+# Inputs are sent on a single line, so allow lines much longer than asyncio's
+# default limit of 64 KiB.
+LINE_LIMIT = 2 ** 30
+
+
+def preload() -> None:
+    """Import every day's module so that workers start with them loaded."""
+    for day in solvers:
+        solvers[day]
+
+
+class SolverServer:
+    def __init__(self, jobs: int | None = None) -> None:
+        self.jobs = jobs
+        self.executor = ProcessPoolExecutor(max_workers=jobs)
+
+    async def solve(self, day: int, text: str, verbose: int) -> DayResult:
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, run_input, day, text, verbose)
+        except BrokenProcessPool:
+            # Replace the pool so that later requests still work. Other
+            # requests that were running in the broken pool will also fail.
+            if self.executor is executor:
+                self.executor = ProcessPoolExecutor(max_workers=self.jobs)
+            return DayResult(day, "", "Worker process terminated abruptly\n")
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        lock = asyncio.Lock()
+        tasks: set[asyncio.Task[None]] = set()
+
+        async def respond(response: dict[str, Any]) -> None:
+            async with lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        async def solve(request_id: Any, day: int, text: str, verbose: int) -> None:
+            result = await self.solve(day, text, verbose)
+            await respond(dict(id=request_id, **asdict(result)))
+
+        try:
+            while line := await reader.readline():
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get("id")
+                    day = int(request["day"])
+                    text = str(request["input"])
+                    verbose = int(request.get("verbose", 0))
+                except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                    await respond(dict(id=request_id, error=f"Bad request: {exc!r}"))
+                    continue
+
+                if day not in solvers:
+                    await respond(dict(id=request_id, day=day, error="Unimplemented!"))
+                    continue
+
+                task = asyncio.create_task(solve(request_id, day, text, verbose))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path: Path) -> None:
+        """Serve until interrupted by SIGINT or SIGTERM."""
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        assert task is not None
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            loop.add_signal_handler(signum, task.cancel)
+
+        server = await asyncio.start_unix_server(
+            self.handle, path=str(path), limit=LINE_LIMIT
+        )
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            path.unlink(missing_ok=True)
+            self.executor.shutdown(cancel_futures=True)
+
+
+def is_running(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+def serve(path: Path, jobs: int | None = None) -> None:
+    if path.exists():
+        if is_running(path):
+            raise RuntimeError(f"A server is already listening on {path}")
+        # Left behind by a server that didn't shut down cleanly.
+        path.unlink()
+
+    preload()
+    asyncio.run(SolverServer(jobs).serve(path))
+
+
+def request(path: Path, day: int, text: str, verbose: int = 0) -> DayResult:
+    """Solve `day` using the server listening on `path`.
+
+    Raises OSError if the server can't be reached.
+    """
+    message = dict(id=0, day=day, input=text, verbose=verbose)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(path))
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("rb") as file:
+            line = file.readline()
+
+    if not line:
+        raise ConnectionError("Server closed the connection without responding")
+
+    response = json.loads(line)
+    return DayResult(
+        day=day,
+        output=response.get("output", ""),
+        error=response.get("error"),
+        timings=response.get("timings", {}),
+    )
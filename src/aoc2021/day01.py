@@ -3,16 +3,23 @@ from typing import IO
 
 from more_itertools import sliding_window
 
-from ._registry import register
+from ._registry import Phased, register
 
 
 def count_increases(it: Iterable[int]) -> int:
     return sum(b > a for a, b in sliding_window(it, 2))
 
 
-@register(day=1)
-def solve(file: IO[str], verbose: int) -> None:
-    depths = [int(line.strip()) for line in file]
+def parse(file: IO[str]) -> list[int]:
+    return [int(line.strip()) for line in file]
 
-    print("Part 1:", count_increases(depths))
-    print("Part 2:", count_increases(map(sum, sliding_window(depths, 3))))
+
+def part1(depths: list[int]) -> int:
+    return count_increases(depths)
+
+
+def part2(depths: list[int]) -> int:
+    return count_increases(map(sum, sliding_window(depths, 3)))
+
+
+solve = register(day=1)(Phased(parse, part1, part2))
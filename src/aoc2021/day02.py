@@ -1,6 +1,14 @@
 from typing import IO
 
-from ._registry import register
+from ._registry import Phased, register
+
+
+def parse(file: IO[str]) -> list[tuple[str, int]]:
+    commands = []
+    for line in file:
+        command, n = line.strip().split()
+        commands.append((command, int(n)))
+    return commands
 
 
 def part1(commands: list[tuple[str, int]]) -> int:
@@ -34,12 +42,4 @@ def part2(commands: list[tuple[str, int]]) -> int:
     return pos * depth
 
 
-@register(day=2)
-def solve(file: IO[str], verbose: int) -> None:
-    commands = []
-    for line in file:
-        command, n = line.strip().split()
-        commands.append((command, int(n)))
-
-    print("Part 1:", part1(commands))
-    print("Part 2:", part2(commands))
+solve = register(day=2)(Phased(parse, part1, part2))
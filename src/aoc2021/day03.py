@@ -4,7 +4,7 @@ from typing import IO, TypeVar
 import numpy as np
 from numpy.typing import NDArray
 
-from ._registry import register
+from ._registry import Phased, register
 
 NDArrayBool = NDArray[np.bool_]
 DT = TypeVar("DT", bound=np.generic)
@@ -46,7 +46,9 @@ def oxygen_generator_rating(a: NDArrayBool) -> int:
     b = a.copy()
     while b.shape[0] > 1:
         keep_mask = b[:, col] == ~least_common(b[:, col])
-        b = b[keep_mask, :]
+        # A column with only one value keeps every row.
+        if keep_mask.any():
+            b = b[keep_mask, :]
         col += 1
     return bits_to_int(b[0])
 
@@ -65,8 +67,12 @@ def life_support_rating(a: NDArrayBool) -> int:
     return oxygen_generator_rating(a) * co2_scrubber_rating(a)
 
 
-@register(day=3)
-def solve(file: IO[str], verbose: int) -> None:
-    a = np.array([list(map(int, line.strip())) for line in file], dtype=bool)
-    print("Part 1:", gamma_rate(a) * epsilon_rate(a))
-    print("Part 2:", life_support_rating(a))
+def parse(file: IO[str]) -> NDArrayBool:
+    return np.array([list(map(int, line.strip())) for line in file], dtype=bool)
+
+
+def power_consumption(a: NDArrayBool) -> int:
+    return gamma_rate(a) * epsilon_rate(a)
+
+
+solve = register(day=3)(Phased(parse, power_consumption, life_support_rating))
@@ -1,75 +1,73 @@
-from collections.abc import Iterable
-from itertools import islice
-from typing import IO, cast
+from typing import IO
 
 import numpy as np
 from numpy.typing import NDArray
 
-from ._registry import register
+from ._registry import Phased, register
 
-NDArrayInt = NDArray[np.int_]
+NDArrayInt = NDArray[np.int64]
 
 
-class BingoBoard:
-    _bingos: list[set[int]]
-    _all: set[int]
-    finished: bool = False
+class Bingo:
+    """Every board of a bingo game, scored at once from the draw order.
 
-    def __init__(self, board: NDArrayInt):
-        self._bingos = [
-            *(set(row) for row in board),
-            *(set(col) for col in board.T),
-        ]
-        self._all = set(cast(Iterable[int], board.flat))
+    Each number on a board is replaced by the index of the draw that marks it,
+    or the number of draws if it is never drawn. A line is complete on the
+    latest draw of its numbers, and a board wins on the earliest of its lines.
+    """
 
-    def check(self, num: int) -> bool:
-        self._all.discard(num)
-        for b in self._bingos:
-            b.discard(num)
-            if not b:
-                self.finished = True
-                return True
+    def __init__(self, order: list[int], boards: NDArrayInt) -> None:
+        self.order = np.array(order, dtype=np.int64)
+        self.boards = boards.reshape(-1, 5, 5)
 
-        return False
+        # The first draw of each distinct number.
+        numbers, first_draws = np.unique(self.order, return_index=True)
+        if numbers.size:
+            i = np.minimum(np.searchsorted(numbers, self.boards), numbers.size - 1)
+            drawn = numbers[i] == self.boards
+            self.ranks = np.where(drawn, first_draws[i], len(order))
+        else:
+            self.ranks = np.full(self.boards.shape, len(order))
 
-    @property
-    def score(self) -> int:
-        return sum(self._all)
+        self.wins = np.minimum(
+            self.ranks.max(axis=2).min(axis=1), self.ranks.max(axis=1).min(axis=1)
+        )
 
+    def score(self, board: int) -> int:
+        win = self.wins[board]
+        unmarked = self.boards[board][self.ranks[board] > win]
+        return int(unmarked.sum()) * int(self.order[win])
 
-def read_input(file: IO[str]) -> tuple[list[int], list[BingoBoard]]:
-    order = list(map(int, file.readline().strip().split(",")))
+    def first_winner(self) -> int | None:
+        """The board that wins first, taking the first of any ties."""
+        if not (self.wins < len(self.order)).any():
+            return None
+        return int(np.argmin(self.wins))
 
-    boards: list[BingoBoard] = []
+    def last_winner(self) -> int | None:
+        """The board that wins last, taking the last of any ties."""
+        winners = np.flatnonzero(self.wins < len(self.order))
+        if not winners.size:
+            return None
+        wins = self.wins[winners]
+        return int(winners[len(wins) - 1 - np.argmax(wins[::-1])])
 
-    while True:
-        file.readline()
-        board = np.array(
-            [list(map(int, line.strip().split())) for line in islice(file, 5)]
-        )
-        if not board.size:
-            break
-        boards.append(BingoBoard(board))
 
-    return order, boards
+def parse(file: IO[str]) -> Bingo:
+    order = list(map(int, file.readline().strip().split(",")))
+    # Boards are only whitespace-separated numbers, which NumPy parses fastest.
+    boards = np.fromstring(file.read(), dtype=np.int64, sep=" ")
+    return Bingo(order, boards)
 
 
-@register(day=4)
-def solve(file: IO[str], verbose: int) -> None:
-    order, boards = read_input(file)
+def part1(bingo: Bingo) -> int | None:
+    board = bingo.first_winner()
+    return None if board is None else bingo.score(board)
 
-    first_score = None
-    last_score = None
 
-    for i, num in enumerate(order):
-        for board in boards:
-            if board.finished:
-                continue
+def part2(bingo: Bingo) -> int | None:
+    board = bingo.last_winner()
+    return None if board is None else bingo.score(board)
 
-            if board.check(num):
-                last_score = num * board.score
-                if first_score is None:
-                    first_score = last_score
 
-    print("Part 1:", first_score)
-    print("Part 2:", last_score)
+solve = register(day=4)(Phased(parse, part1, part2))
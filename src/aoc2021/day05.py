@@ -1,14 +1,30 @@
 import re
+from bisect import bisect_left, bisect_right, insort
 from collections import defaultdict
 from collections.abc import Iterable
 from typing import IO
 
 import attr
 import numpy as np
+from numpy.typing import NDArray
 
-from ._registry import register
+from ._registry import Phased, options, register
 from ._util import Vector
 
+NDArrayInt = NDArray[np.int64]
+
+# Largest coordinate span (in cells) that the raster engine will allocate a
+# dense grid for. Larger spans, or spans with fewer points on lines than
+# cells, fall back to counting sparse points.
+DENSE_LIMIT = 1 << 22
+
+# Maximum number of points expanded at once by the sparse raster engine.
+CHUNK_POINTS = 1 << 22
+
+# Most points on lines that the sparse raster engine will expand. Each distinct
+# point takes 9 bytes, so this bounds its memory to a few hundred MiB.
+SPARSE_POINTS = 1 << 25
+
 
 @attr.s(auto_attribs=True, frozen=True)
 class Line:
@@ -40,7 +56,7 @@ class Line:
         return self.start.x == self.end.x
 
 
-def count_intersections(lines: list[Line]) -> int:
+def walk_intersections(lines: list[Line]) -> int:
     grid: dict[tuple[int, int], int] = defaultdict(int)
 
     for line in lines:
@@ -50,14 +66,350 @@ def count_intersections(lines: list[Line]) -> int:
     return sum(1 for value in grid.values() if value > 1)
 
 
-@register(day=5)
-def solve(file: IO[str], verbose: int) -> None:
+def as_array(lines: list[Line]) -> NDArrayInt:
+    """Return an (n, 4) array of x1, y1, x2, y2 for each line."""
+    return np.array(
+        [(line.start.x, line.start.y, line.end.x, line.end.y) for line in lines],
+        dtype=np.int64,
+    ).reshape(-1, 4)
+
+
+def _coverage(
+    shape: tuple[int, int], rows: NDArrayInt, cols: NDArrayInt, lengths: NDArrayInt
+) -> NDArrayInt:
+    """Count how many vertical runs cover each cell of a grid.
+
+    Each run starts at (rows, cols) and covers `lengths` cells downwards. This
+    is a difference array accumulated down the columns.
+    """
+    height, width = shape
+    size = (height + 1) * width
+    diff = np.bincount(rows * width + cols, minlength=size) - np.bincount(
+        (rows + lengths) * width + cols, minlength=size
+    )
+    return np.cumsum(diff.reshape(height + 1, width)[:height], axis=0)
+
+
+def _dense_raster(coords: NDArrayInt, width: int, height: int) -> int:
+    x1, y1, x2, y2 = coords.T
+    dx = np.sign(x2 - x1)
+    dy = np.sign(y2 - y1)
+    lengths = np.maximum(np.abs(x2 - x1), np.abs(y2 - y1)) + 1
+    # Start every line from its smallest y (or x for horizontal lines).
+    top_x = np.where(y1 <= y2, x1, x2)
+    top_y = np.minimum(y1, y2)
+    ys = np.arange(height)[:, np.newaxis]
+    xs = np.arange(width)[np.newaxis, :]
+
+    horizontal = dy == 0
+    vertical = (dx == 0) & ~horizontal
+    diagonal = dx * dy > 0
+    antidiagonal = dx * dy < 0
+
+    # Horizontal lines are vertical runs in the transposed grid.
+    grid = _coverage(
+        (width, height),
+        np.minimum(x1, x2)[horizontal],
+        y1[horizontal],
+        lengths[horizontal],
+    ).T
+    grid += _coverage((height, width), top_y[vertical], x1[vertical], lengths[vertical])
+
+    # Diagonals become vertical runs after shearing the grid so that each
+    # diagonal is a column: x - y for diagonals and x + y for antidiagonals.
+    sheared_width = width + height - 1
+    sheared = _coverage(
+        (height, sheared_width),
+        top_y[diagonal],
+        (top_x - top_y + height - 1)[diagonal],
+        lengths[diagonal],
+    )
+    grid += sheared[ys, xs - ys + height - 1]
+    sheared = _coverage(
+        (height, sheared_width),
+        top_y[antidiagonal],
+        (top_x + top_y)[antidiagonal],
+        lengths[antidiagonal],
+    )
+    grid += sheared[ys, xs + ys]
+
+    return int(np.count_nonzero(grid > 1))
+
+
+def _sparse_raster(coords: NDArrayInt, width: int) -> int:
+    x1, y1, x2, y2 = coords.T
+    dx = np.sign(x2 - x1)
+    dy = np.sign(y2 - y1)
+    lengths = np.maximum(np.abs(x2 - x1), np.abs(y2 - y1)) + 1
+    ends = np.cumsum(lengths)
+
+    # Every distinct point so far, sorted, and how many lines cover it up to
+    # a maximum of 2, which is all that matters.
+    keys = np.empty(0, dtype=np.int64)
+    counts = np.empty(0, dtype=np.int8)
+    start = 0
+    while start < len(coords):
+        # Expand as many lines as fit in one chunk (and at least one).
+        offset = ends[start - 1] if start else 0
+        stop = max(
+            start + 1,
+            int(np.searchsorted(ends, offset + CHUNK_POINTS, side="right")),
+        )
+        chunk = slice(start, stop)
+        line = np.repeat(np.arange(start, stop), lengths[chunk])
+        starts = np.repeat(ends[chunk] - lengths[chunk], lengths[chunk])
+        steps = offset + np.arange(len(line)) - starts
+        points = (y1[line] + dy[line] * steps) * width + x1[line] + dx[line] * steps
+        chunk_keys, chunk_counts = np.unique(points, return_counts=True)
+        del line, starts, steps, points
+
+        all_keys = np.concatenate([keys, chunk_keys])
+        all_counts = np.concatenate([counts, np.minimum(chunk_counts, 2)])
+        order = np.argsort(all_keys, kind="stable")
+        all_keys = all_keys[order]
+        firsts = np.flatnonzero(np.r_[True, all_keys[1:] != all_keys[:-1]])
+        keys = all_keys[firsts]
+        counts = np.minimum(np.add.reduceat(all_counts[order], firsts), 2).astype(
+            np.int8
+        )
+        start = stop
+
+    return int(np.count_nonzero(counts > 1))
+
+
+def raster_intersections(lines: list[Line]) -> int:
+    """Rasterise all lines at once using NumPy.
+
+    When the lines cover the grid they span densely, each family of lines
+    (horizontal, vertical and both diagonals) is drawn into a dense grid with a
+    difference array, which costs O(lines + cells) regardless of line length.
+    Otherwise every point of every line is expanded in chunks, which are
+    merged into one sorted array of the distinct points so far. That costs
+    O(points) time and O(distinct points) memory, so when the lines have more
+    than SPARSE_POINTS points they're handed to the sweep engine instead.
+    """
+    if not lines:
+        return 0
+
+    coords = as_array(lines)
+    xs = coords[:, [0, 2]]
+    ys = coords[:, [1, 3]]
+    coords = coords - [xs.min(), ys.min(), xs.min(), ys.min()]
+    width = int(xs.max() - xs.min()) + 1
+    height = int(ys.max() - ys.min()) + 1
+
+    lengths = np.abs(coords[:, 2:] - coords[:, :2]).max(axis=1) + 1
+    if width * height <= min(DENSE_LIMIT, lengths.sum()):
+        return _dense_raster(coords, width, height)
+    if lengths.sum() > SPARSE_POINTS:
+        return sweep_intersections(lines)
+    return _sparse_raster(coords, width)
+
+
+# A (key, start, end) run of points along one line, or merged lines, of a
+# family. The key is constant along the line and start/end are positions.
+Segment = tuple[int, int, int]
+
+# Lines are split into four families: horizontal, vertical, diagonal and
+# antidiagonal. Each family's key is a * x + b * y for these coefficients, and
+# positions along a line are y for vertical lines and x for the others.
+FAMILY_KEYS = [(0, 1), (1, 0), (1, -1), (1, 1)]
+VERTICAL = 1
+
+
+def _family(line: Line) -> int:
+    dx = line.end.x - line.start.x
+    dy = line.end.y - line.start.y
+    if dy == 0:
+        return 0
+    if dx == 0:
+        return 1
+    return 2 if (dx > 0) == (dy > 0) else 3
+
+
+def _key(family: int, x: int, y: int) -> int:
+    a, b = FAMILY_KEYS[family]
+    return a * x + b * y
+
+
+def _position(family: int, x: int, y: int) -> int:
+    return y if family == VERTICAL else x
+
+
+def _point(family: int, key: int, position: int) -> tuple[int, int]:
+    if family == VERTICAL:
+        return key, position
+    a, b = FAMILY_KEYS[family]
+    return position, (key - a * position) // b
+
+
+def _crossing(f: int, f_key: int, g: int, g_key: int) -> tuple[int, int] | None:
+    """The integer point with the given keys in two different families."""
+    a1, b1 = FAMILY_KEYS[f]
+    a2, b2 = FAMILY_KEYS[g]
+    det = a1 * b2 - a2 * b1
+    x, x_rem = divmod(f_key * b2 - g_key * b1, det)
+    y, y_rem = divmod(a1 * g_key - a2 * f_key, det)
+    # Diagonals and antidiagonals only cross at integer points if their keys
+    # have the same parity.
+    return None if x_rem or y_rem else (x, y)
+
+
+def _sweep_family(segments: list[Segment]) -> tuple[list[Segment], list[Segment]]:
+    """Return the union of `segments` and the parts covered at least twice.
+
+    Both are returned as sorted, disjoint segments.
+    """
+    covered: list[Segment] = []
+    overlaps: list[Segment] = []
+    last_key = None
+    furthest = 0
+    for key, start, end in sorted(segments):
+        if key != last_key:
+            last_key = key
+            furthest = end
+            covered.append((key, start, end))
+            continue
+
+        # Everything from here up to the furthest end of an earlier segment
+        # is covered at least twice.
+        if start <= furthest:
+            overlap_end = min(end, furthest)
+            if overlaps and overlaps[-1][0] == key and start <= overlaps[-1][2] + 1:
+                _, overlap_start, previous_end = overlaps[-1]
+                overlaps[-1] = (key, overlap_start, max(previous_end, overlap_end))
+            else:
+                overlaps.append((key, start, overlap_end))
+
+        if start <= covered[-1][2] + 1:
+            covered[-1] = (key, covered[-1][1], max(covered[-1][2], end))
+        else:
+            covered.append((key, start, end))
+        furthest = max(furthest, end)
+
+    return covered, overlaps
+
+
+def _crossings(
+    f: int, f_segments: list[Segment], g: int, g_segments: list[Segment]
+) -> Iterable[tuple[int, int]]:
+    """Yield the points where segments of family f cross segments of family g.
+
+    This sweeps along g's key. Each f segment is active between the g keys at
+    its ends, and each g segment looks up the active f keys that it spans.
+    Segments in each family must be disjoint.
+    """
+    # Events sort entering before querying before leaving at the same key.
+    events: list[tuple[int, int, int, int, int]] = []
+    for key, start, end in f_segments:
+        g_keys = [_key(g, *_point(f, key, position)) for position in (start, end)]
+        events.append((min(g_keys), 0, key, 0, 0))
+        events.append((max(g_keys), 2, key, 0, 0))
+    for key, start, end in g_segments:
+        f_keys = [_key(f, *_point(g, key, position)) for position in (start, end)]
+        events.append((key, 1, 0, min(f_keys), max(f_keys)))
+    events.sort()
+
+    # Segments of f with the same key never overlap, so the active keys are
+    # unique.
+    active: list[int] = []
+    for g_key, kind, f_key, low, high in events:
+        match kind:
+            case 0:
+                insort(active, f_key)
+            case 1:
+                spanned = active[bisect_left(active, low) : bisect_right(active, high)]
+                for key in spanned:
+                    if point := _crossing(f, key, g, g_key):
+                        yield point
+            case 2:
+                active.remove(f_key)
+
+
+def _covers(segments: list[Segment], key: int, position: int) -> bool:
+    index = bisect_left(segments, (key, position + 1, position + 1)) - 1
+    if index < 0:
+        return False
+    segment_key, start, end = segments[index]
+    return segment_key == key and start <= position <= end
+
+
+def sweep_intersections(lines: list[Line]) -> int:
+    """Count overlaps without visiting every point of every line.
+
+    Collinear lines can only overlap with lines of the same family and key,
+    which is found by sweeping along each key. Lines of different families
+    cross at single points, found by sweeping one family's key across the
+    other. The cost depends on the number of lines and overlapping points,
+    not on the lengths of the lines or the span of the grid.
+    """
+    segments: list[list[Segment]] = [[] for _ in FAMILY_KEYS]
+    for line in lines:
+        family = _family(line)
+        x1, y1 = int(line.start.x), int(line.start.y)
+        x2, y2 = int(line.end.x), int(line.end.y)
+        start = _position(family, x1, y1)
+        end = _position(family, x2, y2)
+        segments[family].append(
+            (_key(family, x1, y1), min(start, end), max(start, end))
+        )
+
+    covered, overlaps = zip(*map(_sweep_family, segments))
+    count = sum(end - start + 1 for family in overlaps for _, start, end in family)
+
+    # Points where different families cross are covered at least twice. They
+    # have already been counted once for each family whose overlaps contain
+    # them, so count them exactly once instead.
+    crossings: dict[tuple[int, int], int] = defaultdict(int)
+    for f in range(len(FAMILY_KEYS)):
+        for g in range(f + 1, len(FAMILY_KEYS)):
+            for point in _crossings(f, covered[f], g, covered[g]):
+                crossings[point] |= 1 << f | 1 << g
+
+    for (x, y), families in crossings.items():
+        count += 1 - sum(
+            _covers(overlaps[family], _key(family, x, y), _position(family, x, y))
+            for family in range(len(FAMILY_KEYS))
+            if families & 1 << family
+        )
+
+    return count
+
+
+ENGINES = {
+    "walk": walk_intersections,
+    "raster": raster_intersections,
+    "sweep": sweep_intersections,
+}
+
+
+DEFAULT_ENGINE = "raster"
+
+
+def count_intersections(lines: list[Line], *, engine: str = DEFAULT_ENGINE) -> int:
+    """Count the points where at least two lines overlap.
+
+    `engine` selects the implementation, one of `ENGINES`.
+    """
+    return ENGINES[engine](lines)
+
+
+def parse(file: IO[str]) -> list[Line]:
     lines = []
     for line in file:
         if match := re.match(r"(\d+),(\d+)\s*->\s*(\d+),(\d+)", line):
             x1, y1, x2, y2 = map(int, match.groups())
             lines.append(Line(Vector(x1, y1), Vector(x2, y2)))
+    return lines
+
+
+def part1(lines: list[Line]) -> int:
+    straight = [line for line in lines if line.straight]
+    return count_intersections(straight, engine=options.get("engine", DEFAULT_ENGINE))
+
+
+def part2(lines: list[Line]) -> int:
+    return count_intersections(lines, engine=options.get("engine", DEFAULT_ENGINE))
+
 
-    straight_lines = [line for line in lines if line.straight]
-    print("Part 1:", count_intersections(straight_lines))
-    print("Part 2:", count_intersections(lines))
+solve = register(day=5)(Phased(parse, part1, part2))
@@ -1,30 +1,119 @@
 from collections import Counter
-from typing import IO
+from collections.abc import Iterable
+from typing import IO, overload
 
-from ._registry import register
+from ._registry import Phased, register
 
+Matrix = tuple[tuple[int, ...], ...]
 
+# Each day, TRANSITION[i][j] fish with timer i come from every fish with timer
+# j: timers count down, and fish at 0 reset to 6 and spawn a new fish at 8.
+TRANSITION: Matrix = tuple(
+    tuple(int(j == i + 1 or (j == 0 and i in (6, 8))) for j in range(9))
+    for i in range(9)
+)
+
+
+def _multiply(a: Matrix, b: Matrix) -> Matrix:
+    return tuple(
+        tuple(sum(x * y for x, y in zip(row, column)) for column in zip(*b))
+        for row in a
+    )
+
+
+def transition_powers(bits: int) -> list[Matrix]:
+    """TRANSITION ** (2 ** bit) for each bit below `bits`, by repeated squaring."""
+    powers = [TRANSITION]
+    while len(powers) < bits:
+        powers.append(_multiply(powers[-1], powers[-1]))
+    return powers
+
+
+def descendants(days: int, powers: list[Matrix] | None = None) -> tuple[int, ...]:
+    """How many fish a single fish with each timer becomes after `days` days.
+
+    This is the sum of each column of TRANSITION ** days. The `powers` from
+    transition_powers() can be shared between calls, and only the ones below
+    the top bit of `days` are needed: it is applied as two products with the
+    power below it, which is far cheaper than squaring the whole matrix.
+    """
+    row: tuple[int, ...] = (1,) * 9
+    top = days.bit_length() - 1
+    if top < 0:
+        return row
+    if powers is None:
+        powers = transition_powers(max(top, 1))
+
+    for bit in range(top):
+        if days >> bit & 1:
+            (row,) = _multiply((row,), powers[bit])
+    if top == 0:
+        (row,) = _multiply((row,), TRANSITION)
+    else:
+        for _ in range(2):
+            (row,) = _multiply((row,), powers[top - 1])
+    return row
+
+
+class School:
+    """Counts of lanternfish by timer.
+
+    Populations are found by exponentiating the daily transition matrix with
+    exact integers, so later days cost O(log days) matrix products rather
+    than one step per day.
+    """
+
+    def __init__(self, fish: list[int]) -> None:
+        fish_counts = Counter(fish)
+        self.fish_counts = [fish_counts[timer] for timer in range(9)]
+
+    def population(self, days: int) -> int:
+        return sum(
+            count * total for count, total in zip(self.fish_counts, descendants(days))
+        )
+
+    def populations(self, days: Iterable[int]) -> list[int]:
+        """Populations for several days, sharing the powers of the transition."""
+        days = list(days)
+        powers = transition_powers(max([1, *(n.bit_length() - 1 for n in days)]))
+        totals = {
+            n: sum(
+                count * total
+                for count, total in zip(self.fish_counts, descendants(n, powers))
+            )
+            for n in set(days)
+        }
+        return [totals[n] for n in days]
+
+
+@overload
 def estimate_population(fish: list[int], days: int) -> int:
-    template = dict.fromkeys(range(9), 0)
-    fish_counts = template | Counter(fish)
+    ...
+
+
+@overload
+def estimate_population(fish: list[int], days: Iterable[int]) -> list[int]:
+    ...
+
+
+def estimate_population(fish: list[int], days: int | Iterable[int]) -> int | list[int]:
+    """Population after `days` days, or a list of them for several days."""
+    school = School(fish)
+    if isinstance(days, int):
+        return school.population(days)
+    return school.populations(days)
+
+
+def parse(file: IO[str]) -> School:
+    return School(list(map(int, file.read().strip().split(","))))
 
-    for day in range(days):
-        new_counts = template.copy()
-        for timer, num in fish_counts.items():
-            if timer == 0:
-                new_counts[6] += num
-                new_counts[8] += num
-            else:
-                new_counts[timer - 1] += num
 
-        fish_counts = new_counts
+def part1(school: School) -> int:
+    return school.population(80)
 
-    return sum(fish_counts.values())
 
+def part2(school: School) -> int:
+    return school.population(256)
 
-@register(day=6)
-def solve(file: IO[str], verbose: int) -> None:
-    fish = list(map(int, file.read().strip().split(",")))
 
-    print("Part 1:", estimate_population(fish, 80))
-    print("Part 2:", estimate_population(fish, 256))
+solve = register(day=6)(Phased(parse, part1, part2))
@@ -1,19 +1,60 @@
-import math
+from bisect import bisect_left
+from itertools import accumulate
 from typing import IO
 
-from ._registry import register
+from ._registry import Phased, register
 
 
-@register(day=7)
-def solve(file: IO[str], verbose: int) -> None:
-    positions = list(map(int, file.read().strip().split(",")))
-    human_engineering = dict()
-    crab_engineering = dict()
-    for value in range(min(positions), max(positions) + 1):
-        human_engineering[value] = sum(abs(p - value) for p in positions)
-        crab_engineering[value] = sum(
-            math.comb(abs(p - value) + 1, 2) for p in positions
-        )
+class Crabs:
+    """Sorted crab positions with prefix sums.
 
-    print("Part 1:", min(human_engineering.values()))
-    print("Part 2:", min(crab_engineering.values()))
+    The fuel cost curves can be evaluated at any position in O(log n).
+    """
+
+    def __init__(self, positions: list[int]) -> None:
+        self.positions = sorted(positions)
+        self.prefix_sums = list(accumulate(self.positions, initial=0))
+        self.sum_of_squares = sum(p * p for p in self.positions)
+
+    def linear_cost(self, target: int) -> int:
+        """Fuel to move every crab to `target` at one unit per step."""
+        below = bisect_left(self.positions, target)
+        total = self.prefix_sums[-1]
+        left = target * below - self.prefix_sums[below]
+        right = total - self.prefix_sums[below] - target * (len(self.positions) - below)
+        return left + right
+
+    def triangular_cost(self, target: int) -> int:
+        """Fuel to move every crab to `target` when each step costs one more.
+
+        A crab d steps away costs d * (d + 1) / 2, so the total is half the
+        sum of squared distances plus the sum of distances.
+        """
+        n = len(self.positions)
+        total = self.prefix_sums[-1]
+        squares = self.sum_of_squares - 2 * target * total + n * target * target
+        return (squares + self.linear_cost(target)) // 2
+
+    def median(self) -> int:
+        return self.positions[len(self.positions) // 2]
+
+    def mean(self) -> float:
+        return self.prefix_sums[-1] / len(self.positions)
+
+
+def parse(file: IO[str]) -> Crabs:
+    return Crabs(list(map(int, file.read().strip().split(","))))
+
+
+def part1(crabs: Crabs) -> int:
+    # Any median minimises the sum of absolute distances.
+    return crabs.linear_cost(crabs.median())
+
+
+def part2(crabs: Crabs) -> int:
+    # The minimum of the triangular cost is within 1/2 of the mean.
+    mean = int(crabs.mean())
+    return min(crabs.triangular_cost(target) for target in range(mean - 1, mean + 2))
+
+
+solve = register(day=7)(Phased(parse, part1, part2))
@@ -1,59 +1,152 @@
+import heapq
 import math
-from collections import deque
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
+from itertools import chain
 from typing import IO
 
+import numpy as np
+from numpy.typing import NDArray
+
 from ._registry import register
 
+# Higher than any height, for the cells beyond the edges of the map.
+EDGE = 10
+
+
+def rows(file: IO[str]) -> Iterator[NDArray[np.int8]]:
+    for line in file:
+        line = line.strip()
+        if line:
+            yield (np.frombuffer(line.encode(), dtype=np.uint8) - ord("0")).astype(
+                np.int8
+            )
+
+
+def low_points(
+    above: NDArray[np.int8] | None,
+    row: NDArray[np.int8],
+    below: NDArray[np.int8] | None,
+) -> NDArray[np.bool_]:
+    """Which cells of `row` are lower than all of their neighbours."""
+    padded = np.pad(row, 1, constant_values=EDGE)
+    low = (row < padded[:-2]) & (row < padded[2:])
+    if above is not None:
+        low &= row < above
+    if below is not None:
+        low &= row < below
+    return low
+
+
+class BasinScanner:
+    """Finds the basins of a heightmap that is read one row at a time.
+
+    Each run of cells below 9 in a row is given a label, and labels that touch
+    in consecutive rows are merged with a union-find. Only the labels of the
+    latest row are kept, along with the size and number of low points of each
+    of their basins. A basin is complete once no cell of the latest row is in
+    it, so memory grows with the width of the map and not its height.
+    """
+
+    def __init__(self) -> None:
+        self.risk_level_sum = 0
+        self._parent: dict[int, int] = dict()
+        self._sizes: dict[int, int] = dict()
+        self._lows: dict[int, int] = dict()
+        self._next_label = 0
+
+    def _find(self, label: int) -> int:
+        parent = self._parent
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    def _union(self, a: int, b: int) -> None:
+        a = self._find(a)
+        b = self._find(b)
+        if a != b:
+            self._parent[b] = a
+            self._sizes[a] += self._sizes.pop(b)
+            self._lows[a] = self._lows.get(a, 0) + self._lows.pop(b, 0)
 
-def adjacent(grid: list[list[int]], x: int, y: int) -> Iterable[tuple[int, int]]:
-    if x > 0:
-        yield x - 1, y
-    if x < len(grid[0]) - 1:
-        yield x + 1, y
-    if y > 0:
-        yield x, y - 1
-    if y < len(grid) - 1:
-        yield x, y + 1
+    def _label(self, row: NDArray[np.int8]) -> NDArray[np.int64]:
+        """Label each run of cells below 9 in `row`, and -1 for the 9s."""
+        inside = row < 9
+        starts = inside.copy()
+        starts[1:] &= ~inside[:-1]
+        runs = np.cumsum(starts) - 1 + self._next_label
+        labels = np.where(inside, runs, -1)
 
+        sizes = np.bincount(runs[inside] - self._next_label).tolist()
+        for label, size in enumerate(sizes, start=self._next_label):
+            self._parent[label] = label
+            self._sizes[label] = size
+        self._next_label += len(sizes)
+        return labels
 
-def adjacent_cells(grid: list[list[int]], x: int, y: int) -> Iterable[int]:
-    for x, y in adjacent(grid, x, y):
-        yield grid[y][x]
+    def _roots(self, labels: NDArray[np.int64]) -> list[int]:
+        """Replace labels by their roots in place, returning the distinct roots."""
+        inside = labels >= 0
+        unique, inverse = np.unique(labels[inside], return_inverse=True)
+        roots = [self._find(label) for label in unique.tolist()]
+        labels[inside] = np.array(roots, dtype=np.int64)[inverse]
+        return roots
+
+    def _complete(self, label: int) -> Iterator[int]:
+        size = self._sizes.pop(label)
+        for _ in range(self._lows.pop(label, 0)):
+            yield size
+
+    def scan(self, rows: Iterable[NDArray[np.int8]]) -> Iterator[int]:
+        """Yield the size of each basin once it is complete, once per low point.
+
+        The risk level of the low points read so far is kept in
+        `risk_level_sum`.
+        """
+        above: NDArray[np.int8] | None = None
+        current: NDArray[np.int8] | None = None
+        labels: NDArray[np.int64] | None = None
+
+        for below in chain(rows, [None]):
+            if current is not None and labels is not None:
+                low = low_points(above, current, below)
+                self.risk_level_sum += int(current[low].sum()) + int(low.sum())
+                low &= labels >= 0
+                unique, counts = np.unique(labels[low], return_counts=True)
+                for label, n in zip(unique.tolist(), counts.tolist()):
+                    self._lows[label] = self._lows.get(label, 0) + n
+
+            if below is None:
+                break
+
+            below_labels = self._label(below)
+            if labels is not None:
+                # Merge runs with those directly above them, skipping repeats
+                # of the same pair along a run.
+                touching = (labels >= 0) & (below_labels >= 0)
+                a = labels[touching]
+                b = below_labels[touching]
+                changes = np.ones(len(a), dtype=bool)
+                changes[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+                for x, y in zip(a[changes].tolist(), b[changes].tolist()):
+                    self._union(x, y)
+
+            previous_roots = self._roots(labels) if labels is not None else []
+            live = set(self._roots(below_labels))
+            for root in set(previous_roots) - live:
+                yield from self._complete(root)
+            self._parent = {root: root for root in live}
+
+            above, current, labels = current, below, below_labels
+
+        for root in list(self._sizes):
+            yield from self._complete(root)
 
 
 @register(day=9)
 def solve(file: IO[str], verbose: int) -> None:
-    grid: list[list[int]] = []
-    for line in file:
-        grid.append(list(map(int, line.strip())))
-
-    risk_sum = 0
-    low_points: list[tuple[int, int]] = []
-    for y, row in enumerate(grid):
-        for x, cell in enumerate(row):
-            if cell < min(adjacent_cells(grid, x, y)):
-                risk_level = cell + 1
-                risk_sum += risk_level
-                low_points.append((x, y))
-
-    print("Part 1:", risk_sum)
-
-    basins: list[int] = []
-    for x, y in low_points:
-        size = 0
-        visited: set[tuple[int, int]] = set()
-        queue = deque([(x, y)])
-
-        while queue:
-            px, py = queue.popleft()
-            if (px, py) in visited:
-                continue
-            visited.add((px, py))
-            height = grid[py][px]
-            if height < 9:
-                size += 1
-                queue.extend(adjacent(grid, px, py))
-        basins.append(size)
-
-    print("Part 2:", math.prod(sorted(basins)[-3:]))
+    scanner = BasinScanner()
+    largest = heapq.nlargest(3, scanner.scan(rows(file)))
+
+    print("Part 1:", scanner.risk_level_sum)
+    print("Part 2:", math.prod(largest))
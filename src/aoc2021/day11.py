@@ -1,62 +1,176 @@
-from collections import deque
-from itertools import count, product
-from typing import IO, Iterable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import count
+from typing import IO
 
-from ._registry import register
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
 
+from ._registry import Phased, register
 
-def adjacent(grid: list[list[int]], x: int, y: int) -> Iterable[tuple[int, int]]:
-    neighbours = product([-1, 0, 1], [-1, 0, 1])
-    width = len(grid[0])
-    height = len(grid)
 
-    for dx, dy in neighbours:
-        if dx == dy == 0:
-            continue
-        nx = x + dx
-        ny = y + dy
+def step(energies: NDArray[np.int8]) -> NDArray[np.int64]:
+    """Step a stack of grids in place, returning how many flashed in each.
 
-        if 0 <= nx < width and 0 <= ny < height:
-            yield nx, ny
+    Every octopus gains one energy, then each wave of new flashes adds the
+    number of flashing neighbours to every octopus, until no more flash.
+    Neighbours are counted with a 3x3 box sum over a zero-padded copy of the
+    wave, taken across rows and then down columns.
+    """
+    grids, height, width = energies.shape
+    padded = np.zeros((grids, height + 2, width + 2), dtype=np.int8)
+    rows = np.empty((grids, height + 2, width), dtype=np.int8)
 
+    energies += 1
+    flashing = energies > 9
+    flashed = flashing.copy()
+    while flashing.any():
+        padded[:, 1:-1, 1:-1] = flashing
+        np.add(padded[:, :, :-2], padded[:, :, 1:-1], out=rows)
+        rows += padded[:, :, 2:]
+        energies += rows[:, :-2]
+        energies += rows[:, 1:-1]
+        energies += rows[:, 2:]
+        energies -= flashing
 
-@register(day=11)
-def solve(file: IO[str], verbose: int) -> None:
-    grid: list[list[int]] = []
-    for line in file:
-        grid.append(list(map(int, line.strip())))
+        np.greater(energies, 9, out=flashing)
+        flashing &= ~flashed
+        flashed |= flashing
 
-    flashes_after_step_100 = 0
-    first_simultaneous_flash_step = None
-    for step in count():
-        flash_queue: deque[tuple[int, int]] = deque()
-        for y, row in enumerate(grid):
-            for x, energy in enumerate(row):
-                grid[y][x] = energy + 1
-                if grid[y][x] > 9:
-                    flash_queue.append((x, y))
+    energies[flashed] = 0
+    return np.count_nonzero(flashed.reshape(grids, -1), axis=1)
 
-        flashed: set[tuple[int, int]] = set()
 
-        while flash_queue:
-            x, y = flash_queue.pop()
-            if (x, y) in flashed:
+def pack(energies: NDArray[np.int8]) -> NDArray[np.uint8]:
+    """Pack each grid's energies into bytes, two 4-bit cells to a byte."""
+    cells = energies.reshape(len(energies), -1).astype(np.uint8)
+    if cells.shape[1] % 2:
+        cells = np.pad(cells, ((0, 0), (0, 1)))
+    cells[:, 0::2] <<= 4
+    return cells[:, 0::2] | cells[:, 1::2]
+
+
+@dataclass(frozen=True)
+class Cycle:
+    """The states of a grid after `start` steps repeat every `period` steps."""
+
+    start: int
+    period: int
+
+
+class Octopuses:
+    """A stack of octopus grids of the same size, which are stepped together.
+
+    The flashes of every step taken so far are kept, so that later queries
+    carry on from where earlier ones stopped. The state of each grid after
+    every step is hashed until it repeats, which finds its cycle.
+    """
+
+    def __init__(self, energies: ArrayLike) -> None:
+        self.energies = np.array(energies, dtype=np.int8)
+        if self.energies.ndim == 2:
+            self.energies = self.energies[np.newaxis]
+        self._current = self.energies.copy()
+        self._history: list[NDArray[np.int64]] = []
+
+        grids = len(self.energies)
+        self.cycles: list[Cycle | None] = [None] * grids
+        self.synchronised: list[int | None] = [None] * grids
+        self._seen: list[dict[bytes, int] | None] = [
+            {state.tobytes(): 0} for state in pack(self.energies)
+        ]
+
+    def _step(self) -> None:
+        flashes = step(self._current)
+        self._history.append(flashes)
+        n = len(self._history)
+
+        size = self.energies[0].size
+        for grid in np.flatnonzero(flashes == size).tolist():
+            if self.synchronised[grid] is None:
+                self.synchronised[grid] = n
+
+        for grid, state in enumerate(pack(self._current)):
+            seen = self._seen[grid]
+            if seen is None:
                 continue
+            key = state.tobytes()
+            if key in seen:
+                self.cycles[grid] = Cycle(seen[key], n - seen[key])
+                # Every later state is one that has been seen already.
+                self._seen[grid] = None
+            else:
+                seen[key] = n
+
+    def steps(self) -> Iterator[NDArray[np.int64]]:
+        """Yield the number of flashes in each grid for every step, forever."""
+        for n in count():
+            if n == len(self._history):
+                self._step()
+            yield self._history[n]
+
+    def find_cycles(self) -> list[Cycle]:
+        while any(cycle is None for cycle in self.cycles):
+            self._step()
+        return [cycle for cycle in self.cycles if cycle is not None]
+
+    def flashes(self, steps: int) -> list[int]:
+        """Flashes in each grid over the first `steps` steps.
+
+        Past the steps that have been simulated, counts are projected from the
+        cycle of each grid, so `steps` can be arbitrarily large.
+        """
+        while len(self._history) < steps and None in self.cycles:
+            self._step()
+
+        # totals[n] is the number of flashes over the first n steps.
+        totals = np.zeros((len(self._history) + 1, len(self.energies)), np.int64)
+        if self._history:
+            np.cumsum(self._history, axis=0, out=totals[1:])
+        if steps < len(totals):
+            return totals[steps].tolist()
+
+        result = []
+        for grid, cycle in enumerate(self.cycles):
+            assert cycle is not None
+            start = int(totals[cycle.start, grid])
+            per_cycle = int(totals[cycle.start + cycle.period, grid]) - start
+            cycles, rest = divmod(steps - cycle.start, cycle.period)
+            partial = int(totals[cycle.start + rest, grid]) - start
+            result.append(start + cycles * per_cycle + partial)
+        return result
+
+    def first_sync(self) -> list[int | None]:
+        """The first step on which every octopus in each grid flashes.
+
+        A grid whose states repeat before that never synchronises, and its
+        step is None.
+        """
+        while any(
+            sync is None and cycle is None
+            for sync, cycle in zip(self.synchronised, self.cycles)
+        ):
+            self._step()
+        return list(self.synchronised)
+
+
+def parse(file: IO[str]) -> Octopuses:
+    return Octopuses([list(map(int, line.strip())) for line in file if line.strip()])
+
+
+def part1(octopuses: Octopuses) -> int:
+    return octopuses.flashes(100)[0]
 
-            if step < 100:
-                flashes_after_step_100 += 1
-            flashed.add((x, y))
-            for nx, ny in adjacent(grid, x, y):
-                grid[ny][nx] += 1
-                if grid[ny][nx] > 9:
-                    flash_queue.append((nx, ny))
 
-        for x, y in flashed:
-            grid[y][x] = 0
+def part2(octopuses: Octopuses) -> int | str:
+    (sync,) = octopuses.first_sync()
+    if sync is not None:
+        return sync
+    (cycle,) = octopuses.find_cycles()
+    return (
+        f"never synchronises (repeats every {cycle.period} steps"
+        f" from step {cycle.start})"
+    )
 
-        if len(flashed) == len(grid) * len(grid[0]):
-            first_simultaneous_flash_step = step + 1
-            break
 
-    print("Part 1:", flashes_after_step_100)
-    print("Part 2:", first_simultaneous_flash_step)
+solve = register(day=11)(Phased(parse, part1, part2))
@@ -1,11 +1,64 @@
-from collections import defaultdict, deque
-from collections.abc import Iterable
+import sys
+from collections import defaultdict
+from collections.abc import Iterator
 from typing import IO, TypeAlias
 
+from ._files import write_lines
 from ._registry import register
 
 Graph: TypeAlias = dict[str, set[str]]
-State: TypeAlias = tuple[str, set[str], list[str], bool]
+
+
+class Caves:
+    """A cave system with caves interned to integer ids.
+
+    Each small cave is given a bit, so a set of visited small caves is an int
+    mask, and big caves have no bit.
+    """
+
+    def __init__(self, nodes: Graph) -> None:
+        self.names = sorted(nodes.keys() | {b for a in nodes.values() for b in a})
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.adjacent = [
+            tuple(self.ids[b] for b in sorted(nodes.get(a, ()))) for a in self.names
+        ]
+        self.bits = [
+            1 << i if name.islower() else 0 for i, name in enumerate(self.names)
+        ]
+
+    def count_paths(
+        self, *, source: str, target: str, allow_one_double_visit: bool = False
+    ) -> int:
+        """Number of paths that explore() would yield, without building them.
+
+        Counts are memoised by (cave, visited small caves, double visit used),
+        which is all that decides how a path can go on.
+        """
+        start = self.ids[source]
+        end = self.ids[target]
+        counts: dict[tuple[int, int, bool], int] = dict()
+
+        def paths_from(cave: int, visited: int, double_visit_used: bool) -> int:
+            if cave == end:
+                return 1
+            visited |= self.bits[cave]
+            key = (cave, visited, double_visit_used)
+            if key in counts:
+                return counts[key]
+
+            total = 0
+            for adjacent in self.adjacent[cave]:
+                if adjacent == start:
+                    continue
+                if visited & self.bits[adjacent]:
+                    if not double_visit_used:
+                        total += paths_from(adjacent, visited, True)
+                else:
+                    total += paths_from(adjacent, visited, double_visit_used)
+            counts[key] = total
+            return total
+
+        return paths_from(start, 0, not allow_one_double_visit)
 
 
 def explore(
@@ -14,58 +67,78 @@ def explore(
     source: str,
     target: str,
     allow_one_double_visit: bool = False,
-) -> Iterable[list[str]]:
+) -> Iterator[list[str]]:
+    """Yield every path from `source` to `target`, depth first.
+
+    A single path and set of visited caves are shared, and undone as the
+    search backtracks, so memory grows with the length of the longest path
+    rather than with the number of paths.
+    """
     path = [source]
     visited = {source}
-
-    states: deque[State] = deque([(source, visited, path, False)])
-    while states:
-        source, visited, path, double_visit_used = states.popleft()
-        if source.islower():
-            visited.add(source)
-
-        for adjacent in nodes[source]:
-            new_path = [*path, adjacent]
-
-            if adjacent == target:
-                yield new_path
+    double_visit: str | None = None
+
+    # Neighbours left to try from each cave on the path.
+    stack = [iter(sorted(nodes[source]))]
+    while stack:
+        adjacent = next(stack[-1], None)
+        if adjacent is None:
+            stack.pop()
+            cave = path.pop()
+            # A cave's second visit is always the deeper one.
+            if cave == double_visit:
+                double_visit = None
             else:
-                if adjacent in visited:
-                    if (
-                        allow_one_double_visit
-                        and not double_visit_used
-                        and adjacent not in {"start", "end"}
-                    ):
-                        states.append(
-                            (adjacent, visited.difference(adjacent), new_path, True)
-                        )
-                    continue
+                visited.discard(cave)
+            continue
 
-                states.append((adjacent, visited.copy(), new_path, double_visit_used))
+        if adjacent == target:
+            yield [*path, adjacent]
+            continue
 
+        if adjacent in visited:
+            if (
+                not allow_one_double_visit
+                or double_visit is not None
+                or adjacent == source
+            ):
+                continue
+            double_visit = adjacent
+        elif adjacent.islower():
+            visited.add(adjacent)
 
-@register(day=12)
-def solve(file: IO[str], verbose: int) -> None:
+        path.append(adjacent)
+        stack.append(iter(sorted(nodes[adjacent])))
 
+
+def parse(file: IO[str]) -> Graph:
     nodes: Graph = defaultdict(set)
     for line in file:
         a, b = line.strip().split("-")
         nodes[a].add(b)
         nodes[b].add(a)
+    return nodes
 
-    part1 = explore(nodes, source="start", target="end")
-    part2 = explore(nodes, source="start", target="end", allow_one_double_visit=True)
-
-    if verbose:
-        part1 = list(part1)
-        for path in part1:
-            print(",".join(path))
 
-    print("Part 1:", sum(1 for _ in part1))
-
-    if verbose:
-        part2 = list(part2)
-        for path in part2:
-            print(",".join(path))
-
-    print("Part 2:", sum(1 for _ in part2))
+@register(day=12)
+def solve(file: IO[str], verbose: int) -> None:
+    nodes = parse(file)
+    caves = Caves(nodes)
+
+    # Paths are only enumerated to print them.
+    for allow_one_double_visit, part in [(False, "Part 1:"), (True, "Part 2:")]:
+        if verbose:
+            paths = explore(
+                nodes,
+                source="start",
+                target="end",
+                allow_one_double_visit=allow_one_double_visit,
+            )
+            write_lines(sys.stdout, (",".join(path) for path in paths))
+
+        count = caves.count_paths(
+            source="start",
+            target="end",
+            allow_one_double_visit=allow_one_double_visit,
+        )
+        print(part, count)
@@ -1,7 +1,16 @@
-from collections import Counter, deque
-from typing import IO, Iterable
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from typing import IO, Any
 
-from ._registry import register
+import numpy as np
+from numpy.typing import NDArray
+
+from ._registry import Phased, register
+
+# Squares of the transition matrix are only taken while they fit in int64.
+# Past that, squaring big integers costs more than stepping with them.
+INT64_LIMIT = 2 ** 63
+MAX_BIT = 62
 
 
 def pairs(s: str) -> Iterable[str]:
@@ -9,37 +18,117 @@ def pairs(s: str) -> Iterable[str]:
         yield s[i - 1 : i + 1]
 
 
+def _matmul(a: NDArray[Any], b: NDArray[Any]) -> NDArray[Any]:
+    """Multiply exactly, switching to arrays of Python ints if int64 could overflow."""
+    if a.size and b.size and a.dtype != object and b.dtype != object:
+        if int(a.max()) * int(b.max()) * a.shape[-1] < INT64_LIMIT:
+            return a @ b
+    return np.dot(a.astype(object), b.astype(object))
+
+
+class Polymerizer:
+    """Element counts of a polymer after any number of steps of pair insertion.
+
+    Each pair is given an index, and one step maps the vector of pair counts
+    through a transition matrix. Steps are taken in jumps of the largest power
+    of two whose matrix power fits in int64, and counts are exact Python ints
+    once they outgrow int64.
+    """
+
+    def __init__(self, template: str, pair_insertion_rules: dict[str, str]) -> None:
+        self.template = template
+
+        produces: dict[str, list[str]] = {}
+        for old, element in pair_insertion_rules.items():
+            produces[old] = [old[0] + element, element + old[1]]
+        self.pairs = sorted(
+            {
+                *pairs(template),
+                *produces,
+                *(p for new in produces.values() for p in new),
+            }
+        )
+        index = {pair: i for i, pair in enumerate(self.pairs)}
+
+        # Pairs without a rule are left as they are.
+        transition = np.zeros((len(self.pairs), len(self.pairs)), dtype=np.int64)
+        for pair, i in index.items():
+            for new in produces.get(pair, [pair]):
+                transition[index[new], i] += 1
+
+        # transition ** 2 ** bit for each bit up to the largest that fits.
+        self.powers = [transition]
+        while len(self.powers) <= MAX_BIT and transition.size:
+            largest = int(self.powers[-1].max())
+            if largest * largest * len(self.pairs) >= INT64_LIMIT:
+                break
+            self.powers.append(self.powers[-1] @ self.powers[-1])
+
+        self._initial = np.zeros(len(self.pairs), dtype=np.int64)
+        for pair in pairs(template):
+            self._initial[index[pair]] += 1
+
+    def _advance(self, counts: NDArray[Any], steps: int) -> NDArray[Any]:
+        top = len(self.powers) - 1
+        jumps, rest = divmod(steps, 1 << top)
+        for _ in range(jumps):
+            counts = _matmul(self.powers[top], counts)
+        for bit in range(top):
+            if rest >> bit & 1:
+                counts = _matmul(self.powers[bit], counts)
+        return counts
+
+    def pair_counts(self, steps: int) -> NDArray[Any]:
+        return self._advance(self._initial, steps)
+
+    def _elements_from_pairs(self, counts: NDArray[Any]) -> Counter[str]:
+        # Every element is the first of a pair, except the last one in the
+        # polymer, which never changes.
+        elements = Counter(self.template[-1:])
+        for pair, count in zip(self.pairs, counts.tolist()):
+            if count:
+                elements[pair[0]] += count
+        return elements
+
+    def elements(self, steps: int) -> Counter[str]:
+        return self._elements_from_pairs(self.pair_counts(steps))
+
+    def element_counts(self, steps: Iterable[int]) -> list[Counter[str]]:
+        """Element counts for several step counts.
+
+        Each count continues from the previous one in ascending order, so the
+        steps are shared.
+        """
+        steps = list(steps)
+        results = {}
+        counts = self._initial
+        done = 0
+        for n in sorted(set(steps)):
+            counts = self._advance(counts, n - done)
+            done = n
+            results[n] = self._elements_from_pairs(counts)
+        return [results[n] for n in steps]
+
+    def snapshots(self, steps: int) -> Iterator[Counter[str]]:
+        """Yield the element counts after each step from 0 up to `steps`."""
+        counts = self._initial
+        yield self._elements_from_pairs(counts)
+        for _ in range(steps):
+            counts = _matmul(self.powers[0], counts)
+            yield self._elements_from_pairs(counts)
+
+    def score(self, steps: int) -> int:
+        most_common, *_, least_common = self.elements(steps).most_common()
+        return most_common[1] - least_common[1]
+
+
 def optimal_polymer(
     template: str, pair_insertion_rules: dict[str, str], *, steps: int
 ) -> int:
-    polymer = Counter(pairs(template))
-    elements = Counter(template)
-
-    # precompute the affected pairs for each rule
-    replacements: list[tuple[str, str, str, str]] = []
-    for old, element in pair_insertion_rules.items():
-        pair1 = old[0] + element
-        pair2 = element + old[1]
-        replacements.append((old, element, pair1, pair2))
-
-    for step in range(steps):
-        changes: Counter[str] = Counter()
-        for old, element, pair1, pair2 in replacements:
-            if old in polymer:
-                count = polymer[old]
-                changes[old] -= count
-                changes[pair1] += count
-                changes[pair2] += count
-                elements[element] += count
-
-        polymer += changes
-
-    most_common, *_, least_common = elements.most_common()
-    return most_common[1] - least_common[1]
-
-
-@register(day=14)
-def solve(file: IO[str], verbose: int) -> None:
+    return Polymerizer(template, pair_insertion_rules).score(steps)
+
+
+def parse(file: IO[str]) -> Polymerizer:
     template = file.readline().strip()
 
     pair_insertion_rules: dict[str, str] = dict()
@@ -52,5 +141,15 @@ def solve(file: IO[str], verbose: int) -> None:
         key, value = line.split(" -> ")
         pair_insertion_rules[key] = value
 
-    print("Part 1:", optimal_polymer(template, pair_insertion_rules, steps=10))
-    print("Part 2:", optimal_polymer(template, pair_insertion_rules, steps=40))
+    return Polymerizer(template, pair_insertion_rules)
+
+
+def part1(polymerizer: Polymerizer) -> int:
+    return polymerizer.score(10)
+
+
+def part2(polymerizer: Polymerizer) -> int:
+    return polymerizer.score(40)
+
+
+solve = register(day=14)(Phased(parse, part1, part2))
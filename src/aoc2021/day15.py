@@ -4,10 +4,18 @@
 # Copyright 2014 Red Blob Games <redblobgames@gmail.com>
 # SPDX-License-Identifer: Apache-2.0
 import heapq
-from collections.abc import Iterable
+import sys
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
 from typing import IO, Callable, Generic, Protocol, TypeAlias, TypeVar
 
-from ._registry import register
+import numpy as np
+from numpy.typing import NDArray
+
+from ._registry import options, register
 
 Location = TypeVar("Location")
 T = TypeVar("T")
@@ -68,7 +76,7 @@ def a_star_search(
 
 
 def reconstruct_path(
-    came_from: dict[Location, Location], start: Location, goal: Location
+    came_from: Mapping[Location, Location], start: Location, goal: Location
 ) -> list[Location]:
     current: Location = goal
     path: list[Location] = []
@@ -90,8 +98,49 @@ def grid_heuristic(a: GridLocation, b: GridLocation) -> float:
 
 
 class Grid:
-    def __init__(self, grid: list[list[int]]) -> None:
+    def __init__(self, grid: list[list[int]], *, cached_fields: int = 8) -> None:
         self.grid = grid
+        self.cached_fields = cached_fields
+        self._fields: OrderedDict[GridLocation, DistanceField] = OrderedDict()
+
+    def distance_field(self, start: GridLocation) -> "DistanceField":
+        """Lowest total risks from `start`, cached for recently used starts."""
+        if start in self._fields:
+            self._fields.move_to_end(start)
+        else:
+            self._fields[start] = DistanceField(self, start)
+            while len(self._fields) > self.cached_fields:
+                self._fields.popitem(last=False)
+        return self._fields[start]
+
+    def invalidate(self) -> None:
+        """Forget cached distance fields, after `grid` has been changed."""
+        self._fields.clear()
+
+    def set_risk(self, id: GridLocation, risk: int) -> None:
+        x, y = id
+        self.grid[y][x] = risk
+        self.invalidate()
+
+    @property
+    def stride(self) -> int:
+        """Row length of padded_risks()."""
+        return self.width + 2
+
+    def node(self, id: GridLocation) -> int:
+        """Index of a location in padded_risks()."""
+        x, y = id
+        return (y + 1) * self.stride + x + 1
+
+    def location(self, node: int) -> GridLocation:
+        y, x = divmod(node, self.stride)
+        return x - 1, y - 1
+
+    def padded_risks(self) -> bytes:
+        """Risk levels row by row, with a border of zeros around the grid."""
+        border = bytes(self.stride)
+        rows = b"".join(bytes([0, *row, 0]) for row in self.grid)
+        return border + rows + border
 
     @property
     def width(self) -> int:
@@ -126,37 +175,442 @@ class Grid:
 
 
 def expand(i: int, n: int) -> int:
-    n += i
-    if n > 9:
-        n = n % 9
-    return n
+    """Raise risk `n` by `i`, wrapping back around to 1 after 9."""
+    return (n + i - 1) % 9 + 1
+
+
+class TiledGrid(Grid):
+    """A view of `across` by `down` copies of a tile.
+
+    Each copy's risks are raised by its distance in tiles from the top left
+    one. Risks are computed from the tile when asked for rather than stored,
+    so `grid` is just the tile. It is a copy of the tile's rows, so that
+    changing either grid can't leave the other's distance fields stale.
+    """
+
+    def __init__(
+        self, tile: Grid, across: int, down: int, *, cached_fields: int = 8
+    ) -> None:
+        super().__init__([row[:] for row in tile.grid], cached_fields=cached_fields)
+        self.across = across
+        self.down = down
+
+    @property
+    def tile_width(self) -> int:
+        return len(self.grid[0])
+
+    @property
+    def tile_height(self) -> int:
+        return len(self.grid)
+
+    @property
+    def width(self) -> int:
+        return self.tile_width * self.across
+
+    @property
+    def height(self) -> int:
+        return self.tile_height * self.down
+
+    def risk(self, id: GridLocation) -> int:
+        tile_x, x = divmod(id[0], self.tile_width)
+        tile_y, y = divmod(id[1], self.tile_height)
+        return expand(tile_x + tile_y, self.grid[y][x])
+
+    def cost(self, from_id: GridLocation, to_id: GridLocation) -> float:
+        return self.risk(to_id)
+
+    def set_risk(self, id: GridLocation, risk: int) -> None:
+        # Every copy of the tile changes along with it.
+        tile_x, x = divmod(id[0], self.tile_width)
+        tile_y, y = divmod(id[1], self.tile_height)
+        super().set_risk((x, y), expand(-(tile_x + tile_y), risk))
+
+    def padded_risks(self) -> bytes:
+        tile = np.array(self.grid, dtype=np.uint8)
+        shifts = np.add.outer(np.arange(self.down), np.arange(self.across)) % 9
+        risks = (
+            tile[np.newaxis, :, np.newaxis, :]
+            + shifts.astype(np.uint8)[:, np.newaxis, :, np.newaxis]
+        )
+        risks = (risks - 1) % 9 + 1
+        return np.pad(risks.reshape(self.height, self.width), 1).tobytes()
+
+    def __str__(self) -> str:
+        return "\n".join(
+            "".join(str(self.risk((x, y))) for x in range(self.width))
+            for y in range(self.height)
+        )
 
 
 class kylo_ren_more:
     @staticmethod
-    def gif(grid: Grid) -> Grid:
-        return Grid(
-            [
-                [expand(x + y, n) for x in range(5) for n in row]
-                for y in range(0, 5)
-                for row in grid.grid
-            ]
-        )
+    def gif(grid: Grid, tiles: int = 5) -> Grid:
+        return TiledGrid(grid, tiles, tiles)
+
+
+def dial(
+    risks: bytes | bytearray,
+    stride: int,
+    distances: list[int],
+    seeds: Iterable[tuple[int, int]],
+    goal: int = -1,
+) -> None:
+    """Lower `distances` in place by searching out from (total risk, node) seeds.
+
+    `risks` is a grid flattened row by row, `stride` cells per row, with a
+    border around it, as returned by Grid.padded_risks(). Nodes are indexes
+    into it, and `distances` must already hold each seed's total risk. Since
+    risks are small integers, a Dial bucket queue holds the frontier: one list
+    of nodes per total risk, modulo the largest risk + 1. Seeds join it when
+    the search reaches their total risk.
+
+    The search stops once `goal` is reached, after which only nodes nearer
+    than the goal are final. Border nodes should be -1 so they're never
+    entered.
+    """
+    buckets: list[list[int]] = [[] for _ in range(max(risks) + 1)]
+    pending = sorted(seeds)
+    directions = (-1, 1, -stride, stride)
+    risk = pending[0][0] if pending else 0
+    i = 0
+    empty = 0
+    while True:
+        while i < len(pending) and pending[i][0] == risk:
+            buckets[risk % len(buckets)].append(pending[i][1])
+            i += 1
+
+        bucket = buckets[risk % len(buckets)]
+        if not bucket:
+            empty += 1
+            if empty < len(buckets):
+                risk += 1
+            elif i < len(pending):
+                # Skip ahead to the next seed.
+                risk = pending[i][0]
+                empty = 0
+            else:
+                return
+            continue
+
+        empty = 0
+        for node in bucket:
+            # Skip nodes that were queued again at a lower risk.
+            if distances[node] != risk:
+                continue
+            if node == goal:
+                return
+            for direction in directions:
+                next_ = node + direction
+                new_risk = risk + risks[next_]
+                if new_risk < distances[next_]:
+                    distances[next_] = new_risk
+                    buckets[new_risk % len(buckets)].append(next_)
+        bucket.clear()
+        risk += 1
+
+
+def dial_search(risks: bytes, stride: int, start: int, goal: int = -1) -> list[int]:
+    """Lowest total risk from `start` to every node of a padded grid.
+
+    See dial() for the layout. The border is marked as -1.
+    """
+    height = len(risks) // stride - 2
+    distances = [-1] * stride
+    distances += ([-1] + [sys.maxsize] * (stride - 2) + [-1]) * height
+    distances += [-1] * stride
+    distances[start] = 0
+    dial(risks, stride, distances, [(0, start)], goal)
+    return distances
+
+
+class DistanceField:
+    """Lowest total risk from `start` to every location of a grid.
+
+    Predecessors are worked out from the distances in one vectorised pass,
+    so paths to any goal can be reconstructed in O(path length) through
+    `came_from`.
+    """
+
+    def __init__(self, grid: Grid, start: GridLocation) -> None:
+        self.grid = grid
+        self.start = start
+        risks = grid.padded_risks()
+        self.distances = dial_search(risks, grid.stride, grid.node(start))
+
+        distances = np.array(self.distances, dtype=np.int64)
+        nodes = np.flatnonzero((distances >= 0) & (distances < sys.maxsize))
+        nodes = nodes[nodes != grid.node(start)]
+        risk = np.frombuffer(risks, dtype=np.uint8)[nodes]
+        self.predecessors = np.full(len(distances), -1, dtype=np.int64)
+        for direction in (-1, 1, -grid.stride, grid.stride):
+            neighbours = nodes + direction
+            found = (
+                (self.predecessors[nodes] < 0)
+                & (distances[neighbours] >= 0)
+                & (distances[neighbours] + risk == distances[nodes])
+            )
+            self.predecessors[nodes[found]] = neighbours[found]
+
+        self.came_from = CameFrom(self)
+
+    def cost(self, goal: GridLocation) -> int:
+        return self.distances[self.grid.node(goal)]
+
+    def path(self, goal: GridLocation) -> list[GridLocation]:
+        return reconstruct_path(self.came_from, self.start, goal)
+
+
+class CameFrom(Mapping[GridLocation, GridLocation]):
+    """The previous location on a lowest risk path, as used by a_star_search."""
+
+    def __init__(self, field: DistanceField) -> None:
+        self.field = field
+
+    def __getitem__(self, id: GridLocation) -> GridLocation:
+        predecessor = int(self.field.predecessors[self.field.grid.node(id)])
+        if predecessor < 0:
+            raise KeyError(id)
+        return self.field.grid.location(predecessor)
+
+    def __iter__(self) -> Iterator[GridLocation]:
+        for node in np.flatnonzero(self.field.predecessors >= 0):
+            yield self.field.grid.location(int(node))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.field.predecessors >= 0))
+
+
+# Sides of a block, for parallel_search.
+LEFT, RIGHT, UP, DOWN = 1, 2, 4, 8
+SIDES = {LEFT: (-1, 0), RIGHT: (1, 0), UP: (0, -1), DOWN: (0, 1)}
+
+
+class SharedGrid:
+    """Padded risks and distances of a grid, as arrays in shared memory.
+
+    Distances are int64, laid out like the risks. The process that creates
+    the memory unlinks it on close(), and workers attach to it by name.
+    """
+
+    def __init__(
+        self, risks: SharedMemory, distances: SharedMemory, shape: tuple[int, int]
+    ) -> None:
+        self._memory = (risks, distances)
+        self.shape = shape
+        self.risks: NDArray[np.uint8] = np.ndarray(shape, np.uint8, risks.buf)
+        self.distances: NDArray[np.int64] = np.ndarray(shape, np.int64, distances.buf)
+
+    @classmethod
+    def create(cls, risks: bytes, stride: int) -> "SharedGrid":
+        shape = (len(risks) // stride, stride)
+        risk_memory = SharedMemory(create=True, size=len(risks))
+        distance_memory = SharedMemory(create=True, size=8 * len(risks))
+        shared = cls(risk_memory, distance_memory, shape)
+        shared.risks.ravel()[:] = np.frombuffer(risks, dtype=np.uint8)
+        shared.distances[:] = sys.maxsize
+        shared.distances[[0, -1]] = -1
+        shared.distances[:, [0, -1]] = -1
+        return shared
+
+    @classmethod
+    def attach(cls, names: tuple[str, str], shape: tuple[int, int]) -> "SharedGrid":
+        risks, distances = names
+        return cls(SharedMemory(risks), SharedMemory(distances), shape)
 
+    @property
+    def names(self) -> tuple[str, str]:
+        risks, distances = self._memory
+        return risks.name, distances.name
+
+    def close(self, unlink: bool = False) -> None:
+        # The arrays must go before the memory they view can be closed.
+        del self.risks, self.distances
+        for memory in self._memory:
+            memory.close()
+            if unlink:
+                memory.unlink()
+
+
+def relax_block(
+    shared: SharedGrid,
+    block: tuple[int, int],
+    size: int,
+    seeds: Iterable[tuple[int, int]] = (),
+) -> int:
+    """Lower distances within one block of a grid, from its seeds and edges.
+
+    The block is copied out of shared memory along with the cells around it.
+    Cells on its edges are relaxed from those neighbouring cells, and they
+    and any (total risk, node) seeds are spread through the block by dial().
+    Returns the sides whose edge cells improved, whose neighbouring blocks
+    may now improve in turn.
+    """
+    top = block[1] * size + 1
+    left = block[0] * size + 1
+    bottom = min(top + size, shared.shape[0] - 1)
+    right = min(left + size, shared.shape[1] - 1)
+    distances = shared.distances[top - 1 : bottom + 1, left - 1 : right + 1].copy()
+    risks = np.pad(shared.risks[top:bottom, left:right], 1)
+
+    # The cells outside each side, and the block's cells along that side.
+    inner = slice(1, -1)
+    edges: dict[int, tuple[tuple[int | slice, int | slice], ...]] = {
+        UP: ((0, inner), (1, inner)),
+        DOWN: ((-1, inner), (-2, inner)),
+        LEFT: ((inner, 0), (inner, 1)),
+        RIGHT: ((inner, -1), (inner, -2)),
+    }
+    before = {side: distances[edge].copy() for side, (_, edge) in edges.items()}
+    queued = np.zeros(distances.shape, dtype=bool)
+    for outside, edge in edges.values():
+        reachable = (distances[outside] >= 0) & (distances[outside] < sys.maxsize)
+        new_risks = np.where(reachable, distances[outside] + risks[edge], sys.maxsize)
+        better = new_risks < distances[edge]
+        distances[edge] = np.where(better, new_risks, distances[edge])
+        queued[edge] |= better
+
+    # Surround the block with a border that dial() never enters.
+    distances[[0, -1]] = -1
+    distances[:, [0, -1]] = -1
+    for risk, node in seeds:
+        y, x = divmod(node, shared.shape[1])
+        y, x = y - top + 1, x - left + 1
+        if risk < distances[y, x]:
+            distances[y, x] = risk
+            queued[y, x] = True
+
+    if not queued.any():
+        return 0
+
+    nodes = np.flatnonzero(queued)
+    flat = distances.ravel().tolist()
+    dial(
+        risks.tobytes(),
+        distances.shape[1],
+        flat,
+        zip(distances.ravel()[nodes].tolist(), nodes.tolist()),
+    )
+    distances = np.array(flat, dtype=np.int64).reshape(distances.shape)
+    shared.distances[top:bottom, left:right] = distances[1:-1, 1:-1]
+
+    changed = 0
+    for side, (_, edge) in edges.items():
+        if not np.array_equal(distances[edge], before[side]):
+            changed |= side
+    return changed
+
+
+_worker_grid: SharedGrid | None = None
+
+
+def _attach_worker(names: tuple[str, str], shape: tuple[int, int]) -> None:
+    global _worker_grid
+    _worker_grid = SharedGrid.attach(names, shape)
+
+
+def _relax_block_in_worker(
+    block: tuple[int, int], size: int, seeds: tuple[tuple[int, int], ...]
+) -> int:
+    assert _worker_grid is not None
+    return relax_block(_worker_grid, block, size, seeds)
+
+
+def parallel_search(
+    grid: Grid, start: GridLocation, *, workers: int, block_size: int = 128
+) -> list[int]:
+    """Lowest total risk from `start` to every node, using worker processes.
+
+    Returns the same distances as dial_search without a goal. The grid is
+    split into square blocks, and the risks and distances are kept in shared
+    memory. Blocks whose edges may improve are relaxed with relax_block,
+    sweeping across the anti-diagonals of blocks, forwards then backwards,
+    until nothing changes. Blocks on one anti-diagonal don't touch each
+    other, so they're relaxed in parallel.
+    """
+    risks = grid.padded_risks()
+    shared = SharedGrid.create(risks, grid.stride)
+    executor = None
+    try:
+        start_node = grid.node(start)
+        across = -(-grid.width // block_size)
+        down = -(-grid.height // block_size)
+        dirty: dict[tuple[int, int], tuple[tuple[int, int], ...]] = {
+            (start[0] // block_size, start[1] // block_size): ((0, start_node),)
+        }
+
+        if workers > 1:
+            executor = ProcessPoolExecutor(
+                workers,
+                initializer=_attach_worker,
+                initargs=(shared.names, shared.shape),
+            )
+
+        diagonals = range(across + down - 1)
+        while dirty:
+            for diagonal in diagonals:
+                batch = [block for block in dirty if sum(block) == diagonal]
+                seeds = [dirty.pop(block) for block in batch]
+                sizes = [block_size] * len(batch)
+                if executor is not None and len(batch) > 1:
+                    results = executor.map(_relax_block_in_worker, batch, sizes, seeds)
+                else:
+                    results = map(partial(relax_block, shared), batch, sizes, seeds)
+
+                for (x, y), sides in zip(batch, results):
+                    for side, (dx, dy) in SIDES.items():
+                        if sides & side and 0 <= x + dx < across and 0 <= y + dy < down:
+                            dirty.setdefault((x + dx, y + dy), ())
+            diagonals = diagonals[::-1]
+
+        return shared.distances.ravel().tolist()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        shared.close(unlink=True)
+
+
+def lowest_risk(
+    graph: WeightedGraph[GridLocation],
+    start: GridLocation,
+    goal: GridLocation,
+    *,
+    workers: int | None = None,
+) -> float:
+    """Lowest total risk from `start` to `goal`.
+
+    Grids are searched with dial_search, or with parallel_search if a number
+    of `workers` is given. Any other graph is searched with a_star_search.
+    """
+    if isinstance(graph, Grid) and workers is not None:
+        return parallel_search(graph, start, workers=workers)[graph.node(goal)]
+    if isinstance(graph, Grid):
+        goal_node = graph.node(goal)
+        distances = dial_search(
+            graph.padded_risks(), graph.stride, graph.node(start), goal_node
+        )
+        return distances[goal_node]
 
-def top_left_to_bottom_right_risk(grid: Grid) -> float:
-    start = (0, 0)
-    goal = (grid.width - 1, grid.height - 1)
     _, cost_so_far = a_star_search(
-        grid, start=start, goal=goal, heuristic=grid_heuristic
+        graph, start=start, goal=goal, heuristic=grid_heuristic
     )
     return cost_so_far[goal]
 
 
+def top_left_to_bottom_right_risk(grid: Grid, *, workers: int | None = None) -> float:
+    return lowest_risk(grid, (0, 0), (grid.width - 1, grid.height - 1), workers=workers)
+
+
+def parse(file: IO[str]) -> Grid:
+    return Grid([[int(c) for c in line.strip()] for line in file])
+
+
 @register(day=15)
 def solve(file: IO[str], verbose: int) -> None:
-    grid = Grid([[int(c) for c in line.strip()] for line in file])
-    print("Part 1:", top_left_to_bottom_right_risk(grid))
+    # --workers opts in to parallel_search with that many processes.
+    workers = options.get("workers")
+
+    grid = parse(file)
+    print("Part 1:", top_left_to_bottom_right_risk(grid, workers=workers))
 
     full_grid = kylo_ren_more.gif(grid)
-    print("Part 2:", top_left_to_bottom_right_risk(full_grid))
+    print("Part 2:", top_left_to_bottom_right_risk(full_grid, workers=workers))
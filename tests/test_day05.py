@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from aoc2021 import day05
+from aoc2021._util import Vector
+from aoc2021.day05 import Line, count_intersections
+
+DIRECTIONS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+def line(x1: int, y1: int, x2: int, y2: int) -> Line:
+    return Line(Vector(x1, y1), Vector(x2, y2))
+
+
+def random_lines(rng: random.Random, n: int, size: int) -> list[Line]:
+    lines: list[Line] = []
+    while len(lines) < n:
+        x, y = rng.randrange(size), rng.randrange(size)
+        # (0, 0) gives zero-length lines.
+        dx, dy = rng.choice(DIRECTIONS)
+        length = rng.randrange(size)
+        if 0 <= x + dx * length < size and 0 <= y + dy * length < size:
+            lines.append(line(x, y, x + dx * length, y + dy * length))
+    return lines
+
+
+def assert_engines_agree(lines: list[Line]) -> None:
+    expected = count_intersections(lines, engine="walk")
+    assert count_intersections(lines, engine="raster") == expected
+    assert count_intersections(lines, engine="sweep") == expected
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_lines(seed: int) -> None:
+    rng = random.Random(seed)
+    assert_engines_agree(random_lines(rng, rng.randrange(1, 40), rng.randrange(1, 30)))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_sparse_raster(monkeypatch: pytest.MonkeyPatch, seed: int) -> None:
+    monkeypatch.setattr(day05, "DENSE_LIMIT", 0)
+    monkeypatch.setattr(day05, "CHUNK_POINTS", 16)
+    rng = random.Random(seed)
+    assert_engines_agree(random_lines(rng, rng.randrange(1, 40), rng.randrange(1, 30)))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_raster_hands_over_to_sweep(monkeypatch: pytest.MonkeyPatch, seed: int) -> None:
+    monkeypatch.setattr(day05, "DENSE_LIMIT", 0)
+    monkeypatch.setattr(day05, "SPARSE_POINTS", 0)
+    rng = random.Random(seed)
+    assert_engines_agree(random_lines(rng, rng.randrange(1, 40), rng.randrange(1, 30)))
+
+
+@pytest.mark.parametrize(
+    "lines, count",
+    [
+        # Diagonals of opposite parity cross between points.
+        ([line(0, 0, 3, 3), line(0, 3, 3, 0)], 0),
+        ([line(0, 0, 4, 4), line(0, 4, 4, 0)], 1),
+        ([line(1, 0, 4, 3), line(0, 4, 4, 0)], 0),
+        # Zero-length lines on a line, on each other and alone.
+        ([line(2, 2, 2, 2), line(0, 0, 4, 4)], 1),
+        ([line(5, 5, 5, 5), line(5, 5, 5, 5)], 1),
+        ([line(5, 5, 5, 5)], 0),
+        # Overlapping collinear lines, and three lines through one point.
+        ([line(0, 0, 5, 0), line(3, 0, 8, 0)], 3),
+        ([line(0, 2, 4, 2), line(2, 0, 2, 4), line(0, 0, 4, 4)], 1),
+    ],
+)
+def test_cases(lines: list[Line], count: int) -> None:
+    assert count_intersections(lines, engine="walk") == count
+    assert_engines_agree(lines)
@@ -0,0 +1,16 @@
+import io
+import random
+
+import pytest
+
+from aoc2021._generate import generators
+from aoc2021._runner import run_input
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("day", sorted(generators))
+def test_generated_input_solves(day: int, seed: int) -> None:
+    file = io.StringIO()
+    generators[day].generate(file, generators[day].default_scale, random.Random(seed))
+    result = run_input(day, file.getvalue(), 0)
+    assert result.ok, result.error